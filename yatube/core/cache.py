@@ -0,0 +1,366 @@
+import os
+import pickle
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import transaction
+
+SEQUENCE_KEY = 'two_tier:sequence'
+MESSAGE_KEY = 'two_tier:message'
+STATS_KEY = 'two_tier:stats'
+WORKERS_KEY = 'two_tier:workers'
+MESSAGE_TIMEOUT = 5 * 60
+STATS_TIMEOUT = 60
+WORKERS_TIMEOUT = 24 * 60 * 60
+MAX_MESSAGES = 1000
+STATS_FIELDS = ('l1_hits', 'l2_hits', 'misses', 'entries', 'bytes')
+MISSING = object()
+
+_local_caches = {}
+_local_caches_lock = threading.Lock()
+
+
+class LocalLRU:
+    """Кеш процесса: LRU с ограничением числа записей и TTL.
+
+    Значения хранятся сериализованными, чтобы запросы не делили
+    изменяемые объекты, а размер кеша считался в байтах.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.l1_hits = self.l2_hits = self.misses = 0
+        self.sequence = None
+        self.published = set()
+        self.next_poll = 0.0
+        self.lock = threading.Lock()
+        self.poll_lock = threading.Lock()
+
+    def _pop(self, key):
+        _, blob = self.entries.pop(key)
+        self.bytes -= len(blob)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, blob = entry
+            if expires <= time.monotonic():
+                self._pop(key)
+                return None
+            self.entries.move_to_end(key)
+            return blob
+
+    def set(self, key, blob, timeout):
+        if timeout <= 0:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._pop(key)
+            self.entries[key] = (time.monotonic() + timeout, blob)
+            self.bytes += len(blob)
+            while len(self.entries) > self.max_entries:
+                self._pop(next(iter(self.entries)))
+
+    def delete(self, keys):
+        with self.lock:
+            for key in keys:
+                if key in self.entries:
+                    self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def record(self, field, count=1):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + count)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'l1_hits': self.l1_hits,
+                'l2_hits': self.l2_hits,
+                'misses': self.misses,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+            }
+
+
+class TwoTierCache(BaseCache):
+    """Кеш процесса (L1) перед общим кешем SHARED_CACHE (L2).
+
+    В L1 попадают только ключи с префиксами LOCAL_PREFIXES и живут там
+    не дольше LOCAL_TIMEOUT. Каждое изменение такого ключа публикуется
+    в L2 как сообщение в общей очереди. Раз в POLL_INTERVAL воркер
+    вычитывает новые сообщения и выбрасывает изменённые ключи из своего
+    L1, так что другие воркеры видят чужую запись не позже чем через
+    POLL_INTERVAL.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED_CACHE', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.poll_interval = options.get('POLL_INTERVAL', 1)
+        self.prefixes = tuple(options.get('LOCAL_PREFIXES', ()))
+        self.worker = f'{socket.gethostname()}:{os.getpid()}:{name}'
+        with _local_caches_lock:
+            if name not in _local_caches:
+                _local_caches[name] = LocalLRU(self._max_entries)
+            self.local = _local_caches[name]
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return bool(self.prefixes) and key.startswith(self.prefixes)
+
+    def local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def fill(self, key, value, version, timeout=DEFAULT_TIMEOUT):
+        self.local.set(
+            self.make_key(key, version),
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self.local_ttl(timeout),
+        )
+
+    def publish(self, keys, version=None):
+        """Выбрасывает ключи из своего L1 и сообщает о них остальным."""
+        local_keys = [
+            self.make_key(key, version) for key in keys if self.is_local(key)
+        ]
+        if not local_keys:
+            return
+        self.local.delete(local_keys)
+        shared = self.shared
+        try:
+            sequence = shared.incr(SEQUENCE_KEY)
+        except ValueError:
+            shared.add(SEQUENCE_KEY, 0, timeout=None)
+            sequence = shared.incr(SEQUENCE_KEY)
+        shared.set(
+            f'{MESSAGE_KEY}:{sequence}', local_keys, timeout=MESSAGE_TIMEOUT
+        )
+        with self.local.lock:
+            self.local.published.add(sequence)
+
+    def sync(self):
+        """Применяет сообщения других воркеров и публикует статистику
+        своего L1 не чаще, чем раз в POLL_INTERVAL."""
+        local = self.local
+        if time.monotonic() < local.next_poll:
+            return
+        if not local.poll_lock.acquire(blocking=False):
+            return
+        try:
+            local.next_poll = time.monotonic() + self.poll_interval
+            shared = self.shared
+            state = shared.get_many([SEQUENCE_KEY, WORKERS_KEY])
+            sequence = state.get(SEQUENCE_KEY, 0)
+            seen, local.sequence = local.sequence, sequence
+            if seen is not None and sequence != seen:
+                self.apply_messages(seen, sequence)
+            workers = state.get(WORKERS_KEY, [])
+            if self.worker not in workers:
+                self.register(workers)
+            shared.set(
+                f'{STATS_KEY}:{self.worker}',
+                local.stats(),
+                timeout=STATS_TIMEOUT,
+            )
+        finally:
+            local.poll_lock.release()
+
+    def register(self, workers):
+        """Добавляет воркер в список тех, кто присылает статистику.
+
+        Заодно из списка выбрасываются воркеры, чья статистика истекла:
+        после перезапусков gunicorn он не растёт. Если параллельная
+        регистрация затрёт запись, воркер добавит себя на следующем
+        опросе; так же список восстанавливается после истечения."""
+        shared = self.shared
+        reports = shared.get_many(
+            [f'{STATS_KEY}:{worker}' for worker in workers]
+        )
+        alive = [
+            worker for worker in workers if f'{STATS_KEY}:{worker}' in reports
+        ]
+        shared.set(WORKERS_KEY, [*alive, self.worker], timeout=WORKERS_TIMEOUT)
+
+    def apply_messages(self, seen, sequence):
+        # Если очередь сброшена или сообщения потерялись, безопаснее
+        # забыть весь L1, чем отдавать чужие устаревшие записи.
+        if sequence < seen or sequence - seen > MAX_MESSAGES:
+            self.local.clear()
+            self.local.published = set()
+            return
+        with self.local.lock:
+            own = self.local.published
+            self.local.published = {n for n in own if n > sequence}
+        keys = [
+            f'{MESSAGE_KEY}:{n}'
+            for n in range(seen + 1, sequence + 1)
+            if n not in own
+        ]
+        messages = self.shared.get_many(keys)
+        if len(messages) < len(keys):
+            self.local.clear()
+            return
+        for local_keys in messages.values():
+            self.local.delete(local_keys)
+
+    def get(self, key, default=None, version=None):
+        self.sync()
+        is_local = self.is_local(key)
+        if is_local:
+            blob = self.local.get(self.make_key(key, version))
+            if blob is not None:
+                self.local.record('l1_hits')
+                return pickle.loads(blob)
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            if is_local:
+                self.local.record('misses')
+            return default
+        if is_local:
+            self.local.record('l2_hits')
+            self.fill(key, value, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        self.sync()
+        found = {}
+        remote = []
+        for key in keys:
+            blob = None
+            if self.is_local(key):
+                blob = self.local.get(self.make_key(key, version))
+            if blob is None:
+                remote.append(key)
+            else:
+                found[key] = pickle.loads(blob)
+        self.local.record('l1_hits', len(found))
+        if remote:
+            values = self.shared.get_many(remote, version=version)
+            for key in filter(self.is_local, remote):
+                if key in values:
+                    self.local.record('l2_hits')
+                    self.fill(key, values[key], version)
+                else:
+                    self.local.record('misses')
+            found.update(values)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self.publish([key], version)
+        if self.is_local(key):
+            self.fill(key, value, version, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout=timeout, version=version)
+        self.publish(list(data), version)
+        for key, value in data.items():
+            if self.is_local(key) and key not in (failed or ()):
+                self.fill(key, value, version, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+        if added:
+            self.publish([key], version)
+        return added
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self.publish([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        self.publish(keys, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self.publish([key], version)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        value = self.shared.decr(key, delta, version=version)
+        self.publish([key], version)
+        return value
+
+    def has_key(self, key, version=None):
+        if self.is_local(key):
+            if self.local.get(self.make_key(key, version)) is not None:
+                return True
+        return self.shared.has_key(key, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout=timeout, version=version)
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+        self.local.sequence = None
+        self.local.published = set()
+        self.local.next_poll = 0.0
+
+
+def delete_on_commit(keys, alias='default'):
+    """Удаляет ключи сразу и, если идёт транзакция, ещё раз после её
+    фиксации: запрос, который между этими моментами заполнит ключ
+    по ещё не зафиксированным данным, не оставит их в кеше."""
+    keys = list(keys)
+    target = caches[alias]
+    target.delete_many(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: target.delete_many(keys))
+
+
+def collect_stats(alias='default'):
+    """Суммарная статистика L1/L2 по всем воркерам, приславшим её
+    за последние STATS_TIMEOUT секунд."""
+    shared = caches[caches[alias].shared_alias]
+    workers = shared.get(WORKERS_KEY, [])
+    reports = shared.get_many([f'{STATS_KEY}:{worker}' for worker in workers])
+    totals = dict.fromkeys(STATS_FIELDS, 0)
+    for report in reports.values():
+        for field in STATS_FIELDS:
+            totals[field] += report[field]
+    lookups = totals['l1_hits'] + totals['l2_hits'] + totals['misses']
+    totals['workers'] = len(reports)
+    totals['l1_hit_rate'] = totals['l1_hits'] / lookups if lookups else 0.0
+    totals['l2_hit_rate'] = totals['l2_hits'] / lookups if lookups else 0.0
+    return totals
+
+
+def isolated_caches():
+    """CACHES для замеров: TwoTierCache остаются, остальные кеши
+    заменяются на память процесса. cache.clear() в замере тогда
+    не сбрасывает общий кеш сайта."""
+    isolated = {}
+    for alias, params in settings.CACHES.items():
+        if params['BACKEND'] == 'core.cache.TwoTierCache':
+            isolated[alias] = params
+        else:
+            isolated[alias] = {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'isolated:{alias}',
+            }
+    return isolated
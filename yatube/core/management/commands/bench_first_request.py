@@ -0,0 +1,72 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import warmup
+from core.cache import isolated_caches
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку первых запросов нового воркера '
+        'без прогрева шаблонов и URL и после него'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        paths = self.paths()
+        rounds = options['rounds']
+        with override_settings(CACHES=isolated_caches()):
+            cold, _ = self.measure(paths, rounds, warm=False)
+            warm, warmup_ms = self.measure(paths, rounds, warm=True)
+        self.stdout.write(
+            f'{len(paths)} страниц, {rounds} прогонов, '
+            f'прогрев: {warmup_ms:.2f} мс'
+        )
+        for path in paths:
+            self.stdout.write(
+                f'{path:>32} | без прогрева: {cold[path]:7.2f} мс'
+                f' | после прогрева: {warm[path]:7.2f} мс'
+            )
+
+    def paths(self):
+        paths = [
+            reverse('posts:index'),
+            reverse('about:author'),
+            reverse('users:login'),
+            reverse('users:signup'),
+        ]
+        post = Post.objects.select_related('author', 'group').first()
+        if post is not None:
+            paths.append(reverse('posts:post_detail', args=(post.pk,)))
+            paths.append(reverse('posts:profile', args=(post.author,)))
+            if post.group_id:
+                paths.append(
+                    reverse('posts:group_list', args=(post.group.slug,))
+                )
+        return paths
+
+    def measure(self, paths, rounds, warm):
+        """Среднее время первого запроса к каждой странице и прогрева
+        в мс."""
+        latencies = dict.fromkeys(paths, 0.0)
+        warmup_ms = 0.0
+        for _ in range(rounds):
+            warmup.reset()
+            cache.clear()
+            if warm:
+                warmup_ms += warmup.warm_up()['ms']
+            client = Client()
+            for path in paths:
+                started = time.perf_counter()
+                client.get(path)
+                latencies[path] += (time.perf_counter() - started) * 1000
+        for path in paths:
+            latencies[path] /= rounds
+        return latencies, warmup_ms / rounds
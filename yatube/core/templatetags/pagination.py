@@ -0,0 +1,57 @@
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+WINDOW = settings.PAGINATOR_WINDOW_CONFIG
+
+
+@register.simple_tag(takes_context=True)
+def query_transform(context, **kwargs):
+    """Возвращает query string текущего запроса с заменёнными
+    параметрами; параметры со значением None удаляются."""
+    query = context['request'].GET.copy()
+    for key, value in kwargs.items():
+        if value is None or value == '':
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return query.urlencode()
+
+
+@register.simple_tag
+def page_window(page_obj, on_each_side=WINDOW, on_ends=1):
+    """Номера страниц для навигации: on_ends первых и последних и
+    on_each_side вокруг текущей; None обозначает пропуск
+    больше чем в одну страницу."""
+    number, num_pages = page_obj.number, page_obj.paginator.num_pages
+    pages = sorted(
+        {
+            *range(1, min(on_ends, num_pages) + 1),
+            *range(
+                max(number - on_each_side, 1),
+                min(number + on_each_side, num_pages) + 1,
+            ),
+            *range(max(num_pages - on_ends + 1, 1), num_pages + 1),
+        }
+    )
+    window = []
+    for page in pages:
+        if window and page - window[-1] == 2:
+            window.append(page - 1)
+        elif window and page - window[-1] > 2:
+            window.append(None)
+        window.append(page)
+    return window
+
+
+@register.filter
+def approx_count(value):
+    """Оценку числа строк выводит коротко и с тильдой: ~1.2M."""
+    if not getattr(value, 'estimated', False):
+        return value
+    for divisor, suffix in ((10**9, 'B'), (10**6, 'M'), (10**3, 'K')):
+        if value >= divisor:
+            short = f'{value / divisor:.1f}'.rstrip('0').rstrip('.')
+            return f'~{short}{suffix}'
+    return f'~{value}'
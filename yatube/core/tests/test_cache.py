@@ -0,0 +1,123 @@
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import WORKERS_KEY, TwoTierCache, collect_stats, isolated_caches
+
+KEY = 'hot:group:mr-robot'
+
+
+class CoreTwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.shared = caches['shared']
+        self.shared.clear()
+
+    def tearDown(self):
+        self.shared.clear()
+
+    def make_worker(self, name, **options):
+        """Кеш отдельного воркера с собственным L1 над общим L2."""
+        return TwoTierCache(
+            f'{self.id()}:{name}',
+            {
+                'OPTIONS': {
+                    'SHARED_CACHE': 'shared',
+                    'LOCAL_PREFIXES': ('hot:',),
+                    'LOCAL_TIMEOUT': 60,
+                    'POLL_INTERVAL': 0,
+                    'MAX_ENTRIES': 100,
+                    **options,
+                }
+            },
+        )
+
+    def test_core_local_tier_serves_hot_keys(self):
+        """Проверяем, что горячий ключ читается из L1 без обращения
+        к L2, а остальные ключи в L1 не попадают."""
+        worker = self.make_worker('a')
+        worker.set(KEY, 'Мистер робот')
+        worker.set('cold', 'E Corp')
+        self.shared.delete_many([KEY, 'cold'])
+        self.assertEqual(worker.get(KEY), 'Мистер робот')
+        self.assertIsNone(worker.get('cold'))
+        self.assertEqual(worker.local.stats()['l1_hits'], 1)
+
+    def test_core_invalidation_reaches_other_workers(self):
+        """Проверяем, что запись и удаление ключа в одном воркере
+        сбрасывают его копию в L1 другого воркера."""
+        writer = self.make_worker('a')
+        reader = self.make_worker('b')
+        writer.set(KEY, 'Мистер робот')
+        self.assertEqual(reader.get(KEY), 'Мистер робот')
+        writer.set(KEY, 'fsociety')
+        self.assertEqual(reader.get(KEY), 'fsociety')
+        writer.delete(KEY)
+        self.assertIsNone(reader.get(KEY))
+
+    def test_core_shared_clear_resets_local_tiers(self):
+        """Проверяем, что сброс L2 очищает L1 всех воркеров."""
+        worker = self.make_worker('a')
+        worker.set(KEY, 'Мистер робот')
+        worker.get(KEY)
+        self.shared.clear()
+        self.assertIsNone(worker.get(KEY))
+
+    def test_core_local_tier_is_bounded(self):
+        """Проверяем, что L1 вытесняет давно не читанные записи
+        и учитывает их размер."""
+        worker = self.make_worker('a', MAX_ENTRIES=2)
+        for key in ('hot:1', 'hot:2', 'hot:3'):
+            worker.set(key, 'x' * 100)
+        stats = worker.local.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertGreater(stats['bytes'], 200)
+        self.shared.clear()
+        worker.local.sequence = None
+        self.assertIsNone(worker.local.get(worker.make_key('hot:1')))
+
+    def test_core_stats_are_collected_from_workers(self):
+        """Проверяем, что статистика L1/L2 собирается со всех
+        воркеров."""
+        first = self.make_worker('a')
+        second = self.make_worker('b')
+        first.set(KEY, 'Мистер робот')
+        first.get(KEY)
+        second.get(KEY)
+        second.get('hot:missing')
+        first.sync()
+        second.sync()
+        stats = collect_stats()
+        self.assertEqual(stats['workers'], 2)
+        self.assertEqual(stats['l1_hits'], 1)
+        self.assertEqual(stats['l2_hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertAlmostEqual(stats['l1_hit_rate'], 1 / 3)
+
+    def test_core_worker_registry_drops_expired_workers(self):
+        """Проверяем, что новый воркер выбрасывает из списка воркеры
+        с истёкшей статистикой, а потерянная регистрация
+        восстанавливается на следующем опросе."""
+        first = self.make_worker('a')
+        first.get(KEY)
+        self.shared.set(
+            WORKERS_KEY, ['old:1:default', first.worker], timeout=None
+        )
+        second = self.make_worker('b')
+        second.get(KEY)
+        self.assertEqual(
+            self.shared.get(WORKERS_KEY), [first.worker, second.worker]
+        )
+        self.shared.set(WORKERS_KEY, [second.worker])
+        first.get(KEY)
+        self.assertEqual(
+            self.shared.get(WORKERS_KEY), [second.worker, first.worker]
+        )
+
+    def test_core_isolated_caches_keep_site_cache(self):
+        """Проверяем, что сброс кеша в замере с isolated_caches
+        не трогает общий кеш сайта."""
+        self.shared.set(KEY, 'Мистер робот')
+        with override_settings(CACHES=isolated_caches()):
+            cache.set(KEY, 'fsociety')
+            cache.clear()
+            self.assertIsNone(cache.get(KEY))
+        self.assertEqual(self.shared.get(KEY), 'Мистер робот')
@@ -0,0 +1,41 @@
+from django.core.paginator import Paginator
+from django.test import TestCase
+
+from posts.estimates import EstimatedCount
+
+from ..templatetags.pagination import approx_count, page_window
+
+
+class CorePaginationTagTests(TestCase):
+    def window(self, number, num_pages):
+        paginator = Paginator(range(num_pages), 1)
+        return page_window(paginator.page(number), on_each_side=2)
+
+    def test_core_page_window_elides_distant_pages(self):
+        """Проверяем, что навигация содержит крайние страницы и окно
+        вокруг текущей, а пропуски отмечены None."""
+        window_config = {
+            (1, 1): [1],
+            (1, 5): [1, 2, 3, 4, 5],
+            (1, 100000): [1, 2, 3, None, 100000],
+            (50, 100000): [1, None, 48, 49, 50, 51, 52, None, 100000],
+            (4, 100000): [1, 2, 3, 4, 5, 6, None, 100000],
+            (100000, 100000): [1, None, 99998, 99999, 100000],
+        }
+        for (number, num_pages), expected in window_config.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(self.window(number, num_pages), expected)
+
+    def test_core_approx_count_formats_estimates(self):
+        """Проверяем формат оценки числа строк и вывод точного числа
+        как есть."""
+        format_config = (
+            (EstimatedCount(1234567), '~1.2M'),
+            (EstimatedCount(2000000), '~2M'),
+            (EstimatedCount(350400), '~350.4K'),
+            (EstimatedCount(950), '~950'),
+            (1234567, 1234567),
+        )
+        for value, expected in format_config:
+            with self.subTest(value=value):
+                self.assertEqual(approx_count(value), expected)
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import warmup
+
+TEMP_TEMPLATES_DIR = tempfile.mkdtemp()
+BROKEN_TEMPLATES = [
+    {
+        **settings.TEMPLATES[0],
+        'DIRS': [*settings.TEMPLATES[0]['DIRS'], TEMP_TEMPLATES_DIR],
+    }
+]
+
+
+class CoreWarmupTests(TestCase):
+    def setUp(self):
+        warmup.reset()
+        self.loader = engines['django'].engine.template_loaders[0]
+
+    def test_core_warm_up_compiles_all_templates(self):
+        """Проверяем, что прогрев компилирует все шаблоны проекта
+        в кеширующий загрузчик."""
+        result = warmup.warm_up()
+        self.assertEqual(result['failed'], [])
+        self.assertGreater(result['url_patterns'], 0)
+        names = warmup.template_names(engines['django'].engine)
+        for name in ('base.html', 'posts/includes/paginator.html'):
+            self.assertIn(name, names)
+        self.assertEqual(len(self.loader.get_template_cache), len(set(names)))
+
+    def test_core_request_after_warm_up_loads_no_templates(self):
+        """Проверяем, что после прогрева запрос не читает шаблоны
+        с диска."""
+        warmup.warm_up()
+        compiled = len(self.loader.get_template_cache)
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(len(self.loader.get_template_cache), compiled)
+
+    def test_core_warm_up_worker_logs_result(self):
+        """Проверяем, что прогрев воркера пишет итог в журнал."""
+        with self.assertLogs('core.warmup', 'INFO') as logs:
+            warmup.warm_up_worker()
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+
+
+@override_settings(TEMPLATES=BROKEN_TEMPLATES)
+class CoreWarmupFailureTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(os.path.join(TEMP_TEMPLATES_DIR, 'broken.html'), 'w') as f:
+            f.write('{% if %}')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_TEMPLATES_DIR, ignore_errors=True)
+
+    def test_core_warm_up_worker_logs_failed_templates(self):
+        """Проверяем, что шаблоны, которые не удалось скомпилировать,
+        попадают в журнал предупреждением."""
+        with self.assertLogs('core.warmup', 'WARNING') as logs:
+            result = warmup.warm_up_worker()
+        self.assertEqual(result['failed'], ['broken.html'])
+        self.assertIn('broken.html', logs.output[0])
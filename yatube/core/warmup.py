@@ -0,0 +1,102 @@
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.urls import clear_url_caches, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def template_dirs(loaders):
+    """Каталоги шаблонов загрузчиков, включая вложенные в cached.Loader."""
+    dirs = []
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            dirs.extend(template_dirs(loader.loaders))
+        else:
+            dirs.extend(loader.get_dirs())
+    return dirs
+
+
+def template_names(engine):
+    """Имена всех шаблонов в каталогах движка, как их передают
+    в get_template."""
+    names = []
+    for directory in template_dirs(engine.template_loaders):
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if filename.startswith('.'):
+                    continue
+                path = os.path.join(root, filename)
+                names.append(os.path.relpath(path, directory))
+    return names
+
+
+def compile_templates():
+    """Компилирует все шаблоны, чтобы они попали в кеширующий загрузчик.
+
+    Возвращает число скомпилированных шаблонов и список имён, которые
+    скомпилировать не удалось.
+    """
+    compiled, failed = 0, []
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError):
+                failed.append(name)
+            else:
+                compiled += 1
+    return compiled, failed
+
+
+def resolve_urls():
+    """Импортирует URLconf и представления и строит таблицы reverse()."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    return len(resolver.url_patterns)
+
+
+def warm_up():
+    """Прогрев воркера до приёма трафика: шаблоны и URL-шаблоны."""
+    started = time.perf_counter()
+    compiled, failed = compile_templates()
+    patterns = resolve_urls()
+    return {
+        'templates': compiled,
+        'failed': failed,
+        'url_patterns': patterns,
+        'ms': (time.perf_counter() - started) * 1000,
+    }
+
+
+def warm_up_worker():
+    """Прогрев при старте воркера с записью итога в журнал."""
+    result = warm_up()
+    logger.info(
+        'Прогрев: %d шаблонов, %d URL-шаблонов за %.0f мс',
+        result['templates'],
+        result['url_patterns'],
+        result['ms'],
+    )
+    if result['failed']:
+        logger.warning(
+            'Не скомпилированы шаблоны: %s', ', '.join(result['failed'])
+        )
+    return result
+
+
+def reset():
+    """Сбрасывает кеш шаблонов и URL-резолвера, как у нового воркера."""
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for loader in engine.template_loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+    clear_url_caches()
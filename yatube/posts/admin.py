@@ -2,6 +2,7 @@ from django.conf import settings
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .paginators import EstimatedCountPaginator
 
 EMPTY_VALUE = settings.DEFAULT_LABEL_VALUE
 
@@ -13,6 +14,8 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = EMPTY_VALUE
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Group)
@@ -27,6 +30,8 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ('pk', 'post', 'text', 'author', 'created')
     search_fields = ('text',)
     list_filter = ('created',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Follow)
@@ -0,0 +1,46 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import feed_cache
+
+STATS_NAMES = ('index', 'group', 'profile', 'post_detail', 'follow')
+STATS_PREFIX = 'not_modified'
+
+
+def stats(name):
+    return feed_cache.stats(f'{STATS_PREFIX}:{name}')
+
+
+class ConditionalPage:
+    """Валидаторы страницы из поколений областей кеша, от которых она
+    зависит, без запросов к базе.
+
+    ETag учитывает ещё зрителя и query string, Last-Modified — время
+    последнего сброса поколения. Если у клиента актуальная копия,
+    not_modified содержит готовый ответ 304.
+    """
+
+    def __init__(self, request, name, scopes):
+        generations = feed_cache.generations(scopes)
+        user = request.user
+        viewer = f'{user.pk}:{user.username}' if user.is_authenticated else ''
+        validator = ':'.join(
+            map(str, (name, viewer, *generations, request.GET.urlencode()))
+        )
+        self.etag = quote_etag(hashlib.md5(validator.encode()).hexdigest())
+        self.last_modified = max(generations) // 10**9
+        self.not_modified = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if self.not_modified is not None:
+            self.finish(self.not_modified)
+        feed_cache.record(
+            f'{STATS_PREFIX}:{name}', self.not_modified is not None
+        )
+
+    def finish(self, response):
+        response['ETag'] = self.etag
+        response['Last-Modified'] = http_date(self.last_modified)
+        return response
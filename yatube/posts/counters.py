@@ -0,0 +1,107 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def _actual_user_counts():
+    return {
+        'actual_posts': _count(Post.objects.all(), 'author'),
+        'actual_followers': _count(Follow.objects.all(), 'author'),
+        'actual_following': _count(Follow.objects.all(), 'user'),
+    }
+
+
+def _ensure_stats(user_id):
+    if UserStats.objects.filter(user_id=user_id).exists():
+        return
+    counts = (
+        User.objects.filter(pk=user_id)
+        .annotate(**_actual_user_counts())
+        .values('actual_posts', 'actual_followers', 'actual_following')
+        .get()
+    )
+    UserStats.objects.get_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': counts['actual_posts'],
+            'followers_count': counts['actual_followers'],
+            'following_count': counts['actual_following'],
+        },
+    )
+
+
+def _change(user_id, field, delta):
+    _ensure_stats(user_id)
+    stats = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    stats.update(**{field: F(field) + delta})
+
+
+def post_created(post):
+    _change(post.author_id, 'posts_count', 1)
+
+
+def comment_added(comment):
+    Post.objects.filter(pk=comment.post_id).update(
+        comments_count=F('comments_count') + 1
+    )
+
+
+def followed(user, author):
+    _change(user.pk, 'following_count', 1)
+    _change(author.pk, 'followers_count', 1)
+
+
+def unfollowed(user, author):
+    _change(user.pk, 'following_count', -1)
+    _change(author.pk, 'followers_count', -1)
+
+
+def reconcile():
+    """Пересчитывает счётчики по исходным таблицам и возвращает число
+    исправленных строк."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=user_id) for user_id in missing),
+        ignore_conflicts=True,
+    )
+    drifted = (
+        UserStats.objects.annotate(**_actual_user_counts())
+        .exclude(
+            posts_count=F('actual_posts'),
+            followers_count=F('actual_followers'),
+            following_count=F('actual_following'),
+        )
+        .values_list('pk', flat=True)
+    )
+    drifted_users = list(drifted)
+    UserStats.objects.filter(pk__in=drifted_users).update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+    comments = _count(Comment.objects.all(), 'post')
+    drifted_posts = list(
+        Post.objects.annotate(actual_comments=comments)
+        .exclude(comments_count=F('actual_comments'))
+        .values_list('pk', flat=True)
+    )
+    Post.objects.filter(pk__in=drifted_posts).update(comments_count=comments)
+    return len(drifted_users) + len(drifted_posts)
@@ -0,0 +1,55 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+CACHE_KEY = 'estimated_count'
+
+
+class EstimatedCount(int):
+    """Приблизительное число строк."""
+
+    estimated = True
+
+
+def planner_estimate(queryset):
+    """Оценка числа строк из плана запроса PostgreSQL; для других СУБД
+    оценки нет и возвращается None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def cached_count(queryset):
+    """Точный COUNT(*), который выше порога кешируется на
+    PAGINATOR_COUNT_CACHE_TIMEOUT и дальше отдаётся как оценка."""
+    query = str(queryset.order_by().values('pk').query)
+    key = f'{CACHE_KEY}:{hashlib.md5(query.encode()).hexdigest()}'
+    count = cache.get(key)
+    if count is not None:
+        return EstimatedCount(count)
+    count = queryset.count()
+    if count >= settings.PAGINATOR_COUNT_ESTIMATE_THRESHOLD:
+        cache.set(key, count, settings.PAGINATOR_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def count(queryset):
+    """Число строк выборки: точное ниже порога
+    PAGINATOR_COUNT_ESTIMATE_THRESHOLD, выше — оценка планировщика
+    или закешированный подсчёт."""
+    estimate = planner_estimate(queryset)
+    if estimate is None:
+        return cached_count(queryset)
+    if estimate < settings.PAGINATOR_COUNT_ESTIMATE_THRESHOLD:
+        return queryset.count()
+    return EstimatedCount(estimate)
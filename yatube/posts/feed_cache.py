@@ -0,0 +1,165 @@
+import hashlib
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import delete_on_commit
+
+CACHE_KEY = settings.POSTS_FEED_CACHE_KEY
+CACHE_TIMEOUT = settings.POSTS_FEED_CACHE_TIMEOUT
+LOCK_TIMEOUT = settings.POSTS_FEED_CACHE_LOCK_TIMEOUT
+STALE_TIMEOUT = settings.POSTS_FEED_CACHE_STALE_TIMEOUT
+EARLY_REFRESH_BETA = 1.0
+WAIT_INTERVAL = 0.05
+GENERATION_KEY = f'{CACHE_KEY}:generation'
+STATS_KEY = 'feed_cache_stats'
+STATS_NAMES = ('index', 'group', 'profile', 'follow')
+INDEX = 'index'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def follower_scope(user_id):
+    return f'follower:{user_id}'
+
+
+def profile_scope(user_id):
+    return f'profile:{user_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def record(name, hit):
+    _incr(f'{STATS_KEY}:{name}:{"hits" if hit else "misses"}')
+
+
+def stats(name):
+    hits = cache.get(f'{STATS_KEY}:{name}:hits', 0)
+    misses = cache.get(f'{STATS_KEY}:{name}:misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+    }
+
+
+def generations(scopes):
+    """Текущие поколения областей кеша: главная лента, группа, автор
+    или подписчик. Страница ленты хранится под ключом из поколений
+    всех областей, от которых она зависит."""
+    keys = [f'{GENERATION_KEY}:{scope}' for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Начальное значение берётся от времени, чтобы после сброса
+            # или вытеснения не вернуться к уже использованному поколению.
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def invalidate(*scopes):
+    """Сбрасывает поколения областей: ключи страниц, собранные
+    на старых поколениях, больше не читаются и вытесняются по TTL.
+    Внутри транзакции сброс повторяется после её фиксации."""
+    delete_on_commit(f'{GENERATION_KEY}:{scope}' for scope in scopes)
+
+
+def freeze(page_obj):
+    """Вычисляет страницу, чтобы в кеш попали строки, а не QuerySet."""
+    page_obj.object_list = list(page_obj.object_list)
+    paginator = getattr(page_obj, 'paginator', None)
+    if paginator is not None:
+        paginator.count
+        paginator.object_list = paginator.object_list.none()
+    return page_obj
+
+
+def _refresh(key, build, timeout):
+    lock_key = f'lock:{key}'
+    try:
+        started = time.monotonic()
+        value = build()
+        delta = time.monotonic() - started
+        cache.set(
+            key,
+            (value, time.time() + timeout, delta),
+            timeout=timeout + STALE_TIMEOUT,
+        )
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def _should_refresh(expires, delta):
+    # Вероятностное раннее обновление (XFetch): чем дольше сборка
+    # и ближе срок, тем вероятнее, что запрос обновит запись заранее.
+    jitter = -delta * EARLY_REFRESH_BETA * math.log(1 - random.random())
+    return time.time() + jitter >= expires
+
+
+def fetch(key, build, timeout=CACHE_TIMEOUT):
+    """Значение из кеша с защитой от лавины промахов.
+
+    Пересобирает запись только тот, кто взял блокировку. Пока она
+    собирается, остальные отдают устаревшую запись (ещё STALE_TIMEOUT
+    после срока), а если записи нет — ждут её до LOCK_TIMEOUT.
+    Возвращает пару (значение, взято ли оно из кеша).
+    """
+    lock_key = f'lock:{key}'
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        if not _should_refresh(expires, delta):
+            return value, True
+        if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            return value, True
+        return _refresh(key, build, timeout), False
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return build(), False
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0], True
+    return _refresh(key, build, timeout), False
+
+
+def get_page(request, name, scopes, build):
+    """Страница ленты name из кеша или, при промахе, собранная build."""
+    # В ключ входят и имена областей: иначе ленты разных подписчиков
+    # с совпавшими поколениями делили бы одну запись.
+    version = ':'.join(
+        f'{scope}={generation}'
+        for scope, generation in zip(scopes, generations(scopes))
+    )
+    digest = hashlib.md5(
+        f'{version}:{request.GET.urlencode()}'.encode()
+    ).hexdigest()
+    page_obj, hit = fetch(
+        f'{CACHE_KEY}:{name}:{digest}', lambda: freeze(build())
+    )
+    record(name, hit)
+    return page_obj
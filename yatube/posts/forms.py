@@ -1,6 +1,8 @@
 from django import forms
+from django.db import transaction
 from django.forms import ModelForm
 
+from . import thumbnails
 from .models import Comment, Post
 
 
@@ -16,6 +18,15 @@ class PostForm(ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit and 'image' in self.changed_data and post.image:
+            # После фиксации: генерация не держит транзакцию запроса,
+            # а при откате миниатюры не создаются.
+            name = post.image.name
+            transaction.on_commit(lambda: thumbnails.schedule(name))
+        return post
+
 
 class CommentForm(ModelForm):
     text = forms.CharField(
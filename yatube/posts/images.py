@@ -0,0 +1,153 @@
+import hashlib
+
+from django.db.models import Count
+from django.utils import timezone
+from PIL import Image
+
+from .models import Post, sharded_image_path
+
+CHUNK_SIZE = 64 * 1024
+SHARDED_PATH = r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.'
+
+
+def content_hash(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def fingerprint(file):
+    """SHA-256, ширина и высота изображения. Pillow читает только
+    заголовок, пиксели не декодируются."""
+    image_hash = content_hash(file)
+    with Image.open(file) as image:
+        width, height = image.size
+    file.seek(0)
+    return image_hash, width, height
+
+
+def prepare_upload(post):
+    """Заполняет размеры и хеш только что загруженной иллюстрации и,
+    если такой файл уже есть в хранилище, ссылается на него вместо
+    сохранения копии. У сообщения без иллюстрации хеш и размеры
+    сбрасываются."""
+    image = post.image
+    if not image:
+        post.image_hash, post.image_width, post.image_height = '', None, None
+        return
+    if image._committed:
+        return
+    post.image_hash, post.image_width, post.image_height = fingerprint(
+        image.file
+    )
+    # Путь зависит только от содержимого, так что копия, если она
+    # есть, лежит ровно там, куда сохранился бы новый файл.
+    name = sharded_image_path(post.image_hash, image.name)
+    if stored_copy(image.storage, name, post.image_hash):
+        image.name = name
+        image._committed = True
+
+
+def stored_copy(storage, name, image_hash):
+    """Лежит ли под name файл с хешем image_hash. Файл с другим
+    содержимым, например копия, оборванная прерванным shard_media,
+    удаляется, чтобы новый сохранился ровно на его место."""
+    if not storage.exists(name):
+        return False
+    with storage.open(name, 'rb') as file:
+        if content_hash(file) == image_hash:
+            return True
+    storage.delete(name)
+    return False
+
+
+def fill_metadata(posts):
+    """Читает иллюстрации posts из хранилища и заполняет их размеры
+    и хеш; возвращает сообщения, для которых это удалось."""
+    filled = []
+    for post in posts:
+        try:
+            with post.image.open('rb') as file:
+                fields = fingerprint(file)
+        except OSError:
+            continue
+        post.image_hash, post.image_width, post.image_height = fields
+        filled.append(post)
+    Post.objects.bulk_update(
+        filled, ('image_hash', 'image_width', 'image_height')
+    )
+    return filled
+
+
+def deduplicate():
+    """Переводит сообщения с одинаковым хешем иллюстрации на самый
+    старый файл и удаляет копии, на которые больше никто не ссылается.
+    Возвращает число удалённых файлов."""
+    from .signals import invalidate_posts_feeds
+
+    storage = Post._meta.get_field('image').storage
+    # Сообщения без иллюстрации не участвуют, даже если у них остался
+    # хеш: иначе пустое имя стало бы «старейшим файлом».
+    with_images = (
+        Post.objects.exclude(image_hash='')
+        .exclude(image='')
+        .exclude(image__isnull=True)
+    )
+    hashes = (
+        with_images.order_by()
+        .values('image_hash')
+        .annotate(files=Count('image', distinct=True))
+        .filter(files__gt=1)
+        .values_list('image_hash', flat=True)
+    )
+    removed = 0
+    for image_hash in hashes.iterator():
+        posts = with_images.filter(image_hash=image_hash)
+        names = list(
+            dict.fromkeys(posts.order_by('pk').values_list('image', flat=True))
+        )
+        keep, copies = names[0], names[1:]
+        moved = posts.exclude(image=keep)
+        invalidate_posts_feeds(moved)
+        moved.update(image=keep, updated_at=timezone.now())
+        for name in copies:
+            if not Post.objects.filter(image=name).exists():
+                storage.delete(name)
+                removed += 1
+    return removed
+
+
+def copy_to_shard(post, storage):
+    """Копирует иллюстрацию post в шардированный путь и возвращает его.
+    Уже лежащий там файл переиспользуется, только если его хеш
+    совпадает."""
+    if not post.image_hash:
+        with post.image.open('rb') as file:
+            fields = fingerprint(file)
+        post.image_hash, post.image_width, post.image_height = fields
+    name = sharded_image_path(post.image_hash, post.image.name)
+    if stored_copy(storage, name, post.image_hash):
+        return name
+    with storage.open(post.image.name, 'rb') as file:
+        saved = storage.save(name, file)
+    if saved != name:
+        # Тот же файл параллельно сохранил другой процесс.
+        storage.delete(saved)
+    return name
+
+
+def move_to_shard(post, old_name, name):
+    """Переписывает Post.image на name, только если иллюстрацию
+    сообщения не заменили, пока копировался файл."""
+    return bool(
+        Post.objects.filter(pk=post.pk, image=old_name).update(
+            image=name,
+            image_hash=post.image_hash,
+            image_width=post.image_width,
+            image_height=post.image_height,
+            updated_at=timezone.now(),
+        )
+    )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from posts import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет размеры и хеш иллюстраций старых сообщений, читая их '
+        'порциями по первичному ключу; с --dedupe склеивает одинаковые '
+        'файлы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--dedupe', action='store_true')
+
+    def handle(self, *args, **options):
+        pending = (
+            Post.objects.filter(image_hash='')
+            .exclude(image='')
+            .exclude(image__isnull=True)
+            .only('pk', 'image')
+            .order_by('pk')
+        )
+        last_pk, filled, skipped = 0, 0, 0
+        while True:
+            chunk = list(
+                pending.filter(pk__gt=last_pk)[: options['chunk_size']]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            done = len(images.fill_metadata(chunk))
+            filled += done
+            skipped += len(chunk) - done
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Заполнено иллюстраций: {filled}, '
+                f'не удалось прочитать: {skipped}'
+            )
+        )
+        if options['dedupe']:
+            removed = images.deduplicate()
+            self.stdout.write(
+                self.style.SUCCESS(f'Удалено копий файлов: {removed}')
+            )
@@ -0,0 +1,90 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User, UserStats
+
+OBJECTS_PER_PAGE = settings.PAGINATOR_SLICING_CONFIG
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость записи и задержку чтения ленты подписок '
+        'по обе стороны порога TIMELINE_CELEBRITY_THRESHOLD. '
+        'Все тестовые данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--followers', type=int, default=2000)
+        parser.add_argument('--posts', type=int, default=50)
+        parser.add_argument('--reads', type=int, default=20)
+
+    def handle(self, *args, **options):
+        followers = options['followers']
+        scenarios = (
+            ('fan-out on write', followers + 1),
+            ('merge on read', followers),
+        )
+        self.stdout.write(
+            f'{followers} подписчиков, {options["posts"]} сообщений, '
+            f'{options["reads"]} чтений ленты'
+        )
+        for name, threshold in scenarios:
+            with override_settings(TIMELINE_CELEBRITY_THRESHOLD=threshold):
+                result = self.run_scenario(
+                    followers, options['posts'], options['reads']
+                )
+            self.stdout.write(
+                f'{name:>16} | запись: {result["write_ms"]:8.2f} мс/сообщение'
+                f', {result["entries"]:8} записей ленты'
+                f' | чтение: {result["read_ms"]:6.2f} мс/страница'
+                f', {result["read_queries"]} запросов'
+            )
+
+    def run_scenario(self, followers, posts, reads):
+        result = {}
+        try:
+            with transaction.atomic():
+                self.measure(result, followers, posts, reads)
+                raise Rollback
+        except Rollback:
+            pass
+        return result
+
+    def measure(self, result, followers, posts, reads):
+        author = User.objects.create_user(username='bench_author')
+        User.objects.bulk_create(
+            User(username=f'bench_follower_{num}') for num in range(followers)
+        )
+        users = User.objects.filter(username__startswith='bench_follower_')
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author) for user in users
+        )
+        UserStats.objects.filter(user=author).update(followers_count=followers)
+        timeline.mark_mode_switch(author.pk)
+        timeline.switch_modes()
+        started = time.perf_counter()
+        for num in range(posts):
+            with transaction.atomic():
+                post = Post.objects.create(author=author, text=f'Bench {num}')
+                timeline.fan_out(post)
+        result['write_ms'] = (time.perf_counter() - started) * 1000 / posts
+        result['entries'] = TimelineEntry.objects.count()
+
+        request = RequestFactory().get('/follow/')
+        reader = users.first()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(reads):
+                list(timeline.paginate_feed(request, reader, OBJECTS_PER_PAGE))
+        result['read_ms'] = (time.perf_counter() - started) * 1000 / reads
+        result['read_queries'] = len(queries) // reads
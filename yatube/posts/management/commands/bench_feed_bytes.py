@@ -0,0 +1,72 @@
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.cache import isolated_caches
+from posts import thumbnails
+
+PICTURE = re.compile(r'<picture>.*?</picture>', re.S)
+SRCSET = re.compile(r'srcset="([^"]*)"')
+SRC = re.compile(r'<img[^>]* src="([^"]*)"')
+CLIENTS = (
+    ('desktop 1x', 1280, 1),
+    ('phone 2x', 390, 2),
+    ('phone 1x', 360, 1),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает объём HTML и изображений страницы ленты при одной '
+        'JPEG-миниатюре на всех клиентов и при выборе из srcset'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=reverse('posts:index'))
+
+    def handle(self, *args, **options):
+        with override_settings(CACHES=isolated_caches()):
+            cache.clear()
+            response = Client().get(options['path'])
+        html = response.content.decode()
+        pictures = PICTURE.findall(html)
+        fallback = sum(self.size(SRC.search(p).group(1)) for p in pictures)
+        self.stdout.write(
+            f'{options["path"]}: {len(pictures)} изображений, '
+            f'HTML {len(response.content)} байт'
+        )
+        for name, viewport, ratio in CLIENTS:
+            needed = min(viewport, thumbnails.WIDTH) * ratio
+            chosen = sum(
+                self.size(self.choose(picture, needed)) for picture in pictures
+            )
+            saved = 1 - chosen / fallback if fallback else 0
+            self.stdout.write(
+                f'{name:>10} | JPEG {thumbnails.WIDTH}px: {fallback:8} байт'
+                f' | srcset: {chosen:8} байт | экономия {saved:.0%}'
+            )
+
+    def choose(self, picture, needed):
+        """URL, который браузер возьмёт из первого srcset: самый узкий
+        вариант не уже needed пикселей, иначе самый широкий."""
+        match = SRCSET.search(picture)
+        if match is None:
+            return SRC.search(picture).group(1)
+        candidates = sorted(
+            (int(width.rstrip('w')), url)
+            for url, width in (
+                candidate.split() for candidate in match.group(1).split(', ')
+            )
+        )
+        for width, url in candidates:
+            if width >= needed:
+                return url
+        return candidates[-1][1]
+
+    def size(self, url):
+        return default_storage.size(url[len(settings.MEDIA_URL) :])
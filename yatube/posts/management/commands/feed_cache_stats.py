@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core import cache
+from posts import conditional, feed_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает долю попаданий в кеш лент, долю ответов '
+        '304 Not Modified и статистику кеша процессов'
+    )
+
+    def handle(self, *args, **options):
+        for name in feed_cache.STATS_NAMES:
+            stats = feed_cache.stats(name)
+            self.stdout.write(
+                f'{name}: {stats["hits"]} попаданий, '
+                f'{stats["misses"]} промахов, '
+                f'hit rate {stats["hit_rate"]:.1%}'
+            )
+        for name in conditional.STATS_NAMES:
+            stats = conditional.stats(name)
+            self.stdout.write(
+                f'{name}: {stats["hits"]} ответов 304 из '
+                f'{stats["hits"] + stats["misses"]}, '
+                f'hit rate {stats["hit_rate"]:.1%}'
+            )
+        stats = cache.collect_stats()
+        self.stdout.write(
+            f'L1/L2: {stats["workers"]} воркеров, '
+            f'L1 hit rate {stats["l1_hit_rate"]:.1%}, '
+            f'L2 hit rate {stats["l2_hit_rate"]:.1%}, '
+            f'{stats["entries"]} записей, {stats["bytes"]} байт в L1'
+        )
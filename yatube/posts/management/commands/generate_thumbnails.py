@@ -0,0 +1,43 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт миниатюры POSTS_THUMBNAILS для изображений всех '
+        'сообщений в пуле процессов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.POSTS_THUMBNAIL_WORKERS or os.cpu_count(),
+            help='Число процессов; 0 — создавать в текущем процессе',
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        started = time.perf_counter()
+        done, failed = thumbnails.generate_many(
+            names.iterator(), options['workers']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Миниатюры созданы для {done} изображений за '
+                f'{time.perf_counter() - started:.1f} с'
+            )
+        )
+        for name in failed:
+            self.stderr.write(f'Не удалось обработать {name}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс сообщений и комментариев'
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Индекс пересобран: {type(backend).__name__}')
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import TimelineEntry
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок всех пользователей с нуля'
+
+    def handle(self, *args, **options):
+        timeline.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Ленты пересобраны: {TimelineEntry.objects.count()} записей'
+            )
+        )
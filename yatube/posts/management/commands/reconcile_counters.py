@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters, timeline
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики сообщений, подписчиков и комментариев '
+        'с исходными таблицами и исправляет расхождения'
+    )
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile()
+        timeline.mark_mode_switch()
+        switched = timeline.switch_modes()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Исправлено счётчиков: {fixed}, '
+                f'изменён режим лент у авторов: {switched}'
+            )
+        )
@@ -0,0 +1,103 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import images, thumbnails
+from posts.models import Post
+from posts.signals import invalidate_posts_feeds
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит иллюстрации сообщений из плоского каталога posts/ '
+        'в posts/ab/cd/<хеш>.<расширение> порциями по первичному ключу. '
+        'Команду можно прервать и запустить снова, сайт при этом '
+        'продолжает работать.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.POSTS_THUMBNAIL_WORKERS,
+            help='Процессы для миниатюр новых путей; 0 — в текущем',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза между порциями в секундах, чтобы не нагружать БД',
+        )
+        parser.add_argument(
+            '--delete-old',
+            action='store_true',
+            help='Удалять старые файлы, на которые больше никто не ссылается',
+        )
+
+    def handle(self, *args, **options):
+        pending = (
+            Post.objects.exclude(image='')
+            .exclude(image__isnull=True)
+            .exclude(image__regex=images.SHARDED_PATH)
+            .only('pk', 'image', 'image_hash', 'image_width', 'image_height')
+            .order_by('pk')
+        )
+        self.storage = Post._meta.get_field('image').storage
+        self.totals = dict.fromkeys(
+            ('moved', 'changed', 'failed', 'deleted'), 0
+        )
+        last_pk = 0
+        while True:
+            batch = list(
+                pending.filter(pk__gt=last_pk)[: options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            self.move_batch(batch, options)
+            time.sleep(options['pause'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Перенесено: {moved}, изменены во время переноса: '
+                '{changed}, ошибок: {failed}, удалено старых файлов: '
+                '{deleted}'.format(**self.totals)
+            )
+        )
+
+    def move_batch(self, batch, options):
+        # Сначала новые файлы и их миниатюры, потом ссылки на них
+        # в БД и только потом удаление старых: на каждом шаге любая
+        # отданная страница указывает на существующие файлы.
+        copies = []
+        for post in batch:
+            try:
+                name = images.copy_to_shard(post, self.storage)
+            except OSError:
+                self.totals['failed'] += 1
+                self.stderr.write(f'Не удалось перенести {post.image.name}')
+                continue
+            copies.append((post, post.image.name, name))
+        _, failed = thumbnails.generate_many(
+            sorted({name for _, _, name in copies}), options['workers']
+        )
+        for name in failed:
+            self.stderr.write(
+                f'Миниатюры {name} не созданы, их создаст первый показ'
+            )
+        moved = []
+        for post, old_name, name in copies:
+            if images.move_to_shard(post, old_name, name):
+                moved.append((post.pk, old_name))
+            else:
+                self.totals['changed'] += 1
+        self.totals['moved'] += len(moved)
+        invalidate_posts_feeds(
+            Post.objects.filter(pk__in=[pk for pk, _ in moved])
+        )
+        if options['delete_old']:
+            for old_name in sorted({old_name for _, old_name in moved}):
+                if not Post.objects.filter(image=old_name).exists():
+                    self.storage.delete(old_name)
+                    self.totals['deleted'] += 1
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = (
+        'Переключает режим лент у авторов, чьё число подписчиков '
+        'пересекло порог: раскладывает их сообщения по лентам '
+        'подписчиков или убирает оттуда'
+    )
+
+    def handle(self, *args, **options):
+        switched = timeline.switch_modes()
+        self.stdout.write(
+            self.style.SUCCESS(f'Изменён режим лент у авторов: {switched}')
+        )
@@ -0,0 +1,82 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_auto_20220425_0517'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'pub_date',
+                    models.DateTimeField(verbose_name='Дата публикации'),
+                ),
+                (
+                    'author',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Автор сообщения',
+                    ),
+                ),
+                (
+                    'post',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='timeline_entries',
+                        to='posts.Post',
+                        verbose_name='Сообщение',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='timeline',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Подписчик',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name_plural': 'Ленты подписок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(
+                fields=['user', '-pub_date', '-post'], name='timeline_feed_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(
+                fields=['user', 'author'], name='timeline_author_idx'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'post'), name='timeline_entry_rule'
+            ),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def populate_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.bulk_create(
+        UserStats(user_id=user_id)
+        for user_id in User.objects.values_list('pk', flat=True)
+    )
+    UserStats.objects.update(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author'),
+        following_count=_count(Follow, 'user'),
+    )
+    Post.objects.update(comments_count=_count(Comment, 'post'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0014_auto_20261018_2116'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                (
+                    'user',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='stats',
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Пользователь',
+                    ),
+                ),
+                (
+                    'posts_count',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Число сообщений'
+                    ),
+                ),
+                (
+                    'followers_count',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Число подписчиков'
+                    ),
+                ),
+                (
+                    'following_count',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Число подписок'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name_plural': 'Счётчики пользователей',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Число комментариев'
+            ),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+TABLE = 'posts_search_index'
+
+CREATE_SQL = {
+    'postgresql': (
+        f'CREATE TABLE {TABLE} ('
+        'doc_id bigint PRIMARY KEY, '
+        'post_id integer NOT NULL REFERENCES posts_post (id) '
+        'ON DELETE CASCADE, '
+        'document tsvector NOT NULL)',
+        f'CREATE INDEX {TABLE}_post ON {TABLE} (post_id)',
+        f'CREATE INDEX {TABLE}_document ON {TABLE} USING GIN (document)',
+    ),
+    'sqlite': (
+        f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+        'post_id UNINDEXED, body, group_title, username, comment, '
+        "tokenize='unicode61 remove_diacritics 2')",
+    ),
+}
+
+
+def create_search_index(apps, schema_editor):
+    for statement in CREATE_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_auto_20261018_2121'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                fields=['post', '-created', '-id'], name='comment_thread_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(
+                fields=['author', 'user'], name='follow_followers_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['-pub_date', '-id'], name='post_feed_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.19 on 2026-10-18 19:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name='Дата изменения',
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_hash',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=64,
+                verbose_name='SHA-256 иллюстрации',
+            ),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(
+                editable=False, null=True, verbose_name='Высота иллюстрации'
+            ),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(
+                editable=False, null=True, verbose_name='Ширина иллюстрации'
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.19 on 2026-10-18 19:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_celebrities(apps, schema_editor):
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers_count__gte=settings.TIMELINE_CELEBRITY_THRESHOLD
+    ).update(is_celebrity=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_post_image_sharded_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='is_celebrity',
+            field=models.BooleanField(
+                default=False,
+                verbose_name='Сообщения подмешиваются в ленты при чтении',
+            ),
+        ),
+        migrations.RunPython(populate_celebrities, migrations.RunPython.noop),
+    ]
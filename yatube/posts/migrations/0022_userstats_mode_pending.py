@@ -0,0 +1,22 @@
+# Generated by Django 2.2.19 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_userstats_is_celebrity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='mode_pending',
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                verbose_name='Режим лент ждёт переключения',
+            ),
+        ),
+    ]
@@ -1,9 +1,26 @@
+import os
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
 User = get_user_model()
 
 
+def sharded_image_path(image_hash, filename):
+    """posts/ab/cd/<хеш>.<расширение>: файлы раскладываются по
+    каталогам по первым байтам хеша, а не копятся в одном."""
+    ext = os.path.splitext(filename)[1].lower()
+    return f'posts/{image_hash[:2]}/{image_hash[2:4]}/{image_hash}{ext}'
+
+
+def post_image_path(instance, filename):
+    # image_hash заполняется в pre_save до сохранения файла.
+    return sharded_image_path(
+        instance.image_hash or uuid.uuid4().hex, filename
+    )
+
+
 class Group(models.Model):
     title = models.CharField('Название группы', max_length=200)
     slug = models.SlugField('Человекопонятный URL', unique=True)
@@ -23,6 +40,7 @@ class Post(models.Model):
         help_text='Напечатайте сообщение',
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -39,11 +57,42 @@ class Post(models.Model):
         verbose_name='Группа сообщения',
     )
     image = models.ImageField(
-        'Иллюстрация сообщения', upload_to='posts/', blank=True, null=True
+        'Иллюстрация сообщения',
+        upload_to=post_image_path,
+        blank=True,
+        null=True,
+    )
+    # Заполняются один раз при загрузке, см. images.fingerprint.
+    image_width = models.PositiveIntegerField(
+        'Ширина иллюстрации', null=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота иллюстрации', null=True, editable=False
+    )
+    image_hash = models.CharField(
+        'SHA-256 иллюстрации',
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев', default=0, editable=False
     )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=('-pub_date', '-id'), name='post_feed_idx'),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_feed_idx',
+            ),
+        ]
         verbose_name_plural = 'Посты'
 
     def __str__(self):
@@ -73,6 +122,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_thread_idx',
+            ),
+        ]
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
@@ -103,7 +158,83 @@ class Follow(models.Model):
                 name='prevent_self_follow_rule',
             ),
         ]
+        # Прямое направление (user, author) покрывает уникальный индекс
+        # profile_follow_rule, обратное нужно для выборки подписчиков.
+        indexes = [
+            models.Index(
+                fields=('author', 'user'), name='follow_followers_idx'
+            ),
+        ]
         verbose_name_plural = 'Подписчики'
 
     def __str__(self):
         return self.user.username
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор сообщения',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Сообщение',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='timeline_entry_rule'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_feed_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'), name='timeline_author_idx'
+            ),
+        ]
+        verbose_name_plural = 'Ленты подписок'
+
+    def __str__(self):
+        return f'{self.user.username}: {self.post_id}'
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Число сообщений', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+    is_celebrity = models.BooleanField(
+        'Сообщения подмешиваются в ленты при чтении', default=False
+    )
+    mode_pending = models.BooleanField(
+        'Режим лент ждёт переключения', default=False, db_index=True
+    )
+
+    class Meta:
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return self.user.username
@@ -0,0 +1,227 @@
+import base64
+import binascii
+import heapq
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+from . import estimates
+
+POST_ORDERING = ('-pub_date', '-id')
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+    """Страница ленты без COUNT(*) и OFFSET: соседние страницы
+    адресуются непрозрачными курсорами."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        if not isinstance(self.object_list, list):
+            self.object_list = list(self.object_list)
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """Строит условие «строго после values» в порядке ordering
+    (или «строго до», если reverse=True)."""
+    condition = Q()
+    equal = {}
+    for name, value in zip(ordering, values):
+        descending = name.startswith('-') != reverse
+        lookup = 'lt' if descending else 'gt'
+        field = name.lstrip('-')
+        condition |= Q(**equal, **{f'{field}__{lookup}': value})
+        equal[field] = value
+    return condition
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        name[1:] if name.startswith('-') else f'-{name}' for name in ordering
+    )
+
+
+def ordering_fields(model, ordering):
+    return [model._meta.get_field(name.lstrip('-')) for name in ordering]
+
+
+class CursorPaginator:
+    """Keyset-пагинатор по полям ordering (по умолчанию pub_date, id)."""
+
+    def __init__(self, object_list, per_page, ordering=POST_ORDERING):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = ordering_fields(object_list.model, self.ordering)
+
+    def encode_cursor(self, direction, values):
+        payload = json.dumps([direction, list(values)], default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = base64.urlsafe_b64decode(cursor.encode())
+            direction, values = json.loads(payload.decode())
+            if direction not in (NEXT, PREVIOUS):
+                raise InvalidCursor(cursor)
+            if len(values) != len(self.fields):
+                raise InvalidCursor(cursor)
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (
+            binascii.Error,
+            UnicodeError,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def key(self, obj):
+        return tuple(getattr(obj, field.attname) for field in self.fields)
+
+    def slice(self, queryset, ordering, direction, values):
+        if direction == PREVIOUS:
+            queryset = queryset.filter(
+                keyset_filter(ordering, values, reverse=True)
+            )
+            ordering = reverse_ordering(ordering)
+        elif values is not None:
+            queryset = queryset.filter(keyset_filter(ordering, values))
+        return queryset.order_by(*ordering)[: self.per_page + 1]
+
+    def fetch(self, direction, values):
+        return list(
+            self.slice(self.object_list, self.ordering, direction, values)
+        )
+
+    def resolve(self, rows):
+        return rows
+
+    def page(self, cursor=None):
+        direction, values = NEXT, None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        rows = self.fetch(direction, values)
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        next_cursor = previous_cursor = None
+        if has_next and rows:
+            next_cursor = self.encode_cursor(NEXT, self.key(rows[-1]))
+        if has_previous and rows:
+            previous_cursor = self.encode_cursor(PREVIOUS, self.key(rows[0]))
+        return CursorPage(
+            self.resolve(rows),
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+        )
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """Keyset-пагинатор поверх нескольких упорядоченных источников.
+
+    sources — пары (queryset, ordering) с убывающими ключами одного вида,
+    например (pub_date, post_id) у записей ленты и (pub_date, id)
+    у сообщений.
+    Каждый источник отдаёт не больше per_page + 1 ключей, ключи сливаются
+    N-way merge-ем с отбрасыванием повторов, а resolve(keys) превращает
+    ключи страницы в объекты.
+    """
+
+    def __init__(self, sources, per_page, resolve):
+        self.sources = [
+            (queryset, tuple(ordering)) for queryset, ordering in sources
+        ]
+        self.per_page = int(per_page)
+        queryset, self.ordering = self.sources[0]
+        self.fields = ordering_fields(queryset.model, self.ordering)
+        self.resolve = resolve
+
+    def key(self, row):
+        return row
+
+    def fetch(self, direction, values):
+        streams = [
+            self.slice(queryset, ordering, direction, values).values_list(
+                *(name.lstrip('-') for name in ordering)
+            )
+            for queryset, ordering in self.sources
+        ]
+        rows = []
+        merged = heapq.merge(*streams, reverse=direction == NEXT)
+        for row in merged:
+            if rows and rows[-1] == row:
+                continue
+            rows.append(row)
+            if len(rows) > self.per_page:
+                break
+        return rows
+
+
+class EstimatedCountPaginator(Paginator):
+    """Нумерованный пагинатор, который на больших выборках не считает
+    строки точно, а берёт оценку из estimates.count."""
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        return estimates.count(self.object_list)
+
+
+def paginate(request, object_list, per_page, ordering=POST_ORDERING):
+    """Возвращает страницу ленты: по курсору из ?cursor= или, для старых
+    ссылок, нумерованную страницу из ?page=."""
+    page_number = request.GET.get('page')
+    if page_number and not request.GET.get('cursor'):
+        paginator = EstimatedCountPaginator(
+            object_list.order_by(*ordering), per_page
+        )
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(object_list, per_page, ordering)
+    return paginator.get_page(request.GET.get('cursor'))
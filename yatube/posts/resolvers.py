@@ -0,0 +1,64 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from core.cache import delete_on_commit
+
+from .models import Group, User
+
+CACHE_KEY = settings.POSTS_RESOLVER_CACHE_KEY
+CACHE_TIMEOUT = settings.POSTS_RESOLVER_CACHE_TIMEOUT
+MISSING_TIMEOUT = settings.POSTS_RESOLVER_MISSING_TIMEOUT
+# Кешируется вместо объекта, которого нет в БД.
+MISSING = False
+
+
+def _key(kind, name):
+    # Имя из URL может содержать пробелы и быть длиннее, чем допускает
+    # memcached, поэтому в ключ идёт хеш.
+    return f'{CACHE_KEY}:{kind}:{md5(name.encode()).hexdigest()}'
+
+
+def group_key(slug):
+    return _key('group', slug)
+
+
+def user_key(username):
+    return _key('user', username)
+
+
+def _resolve(key, queryset, **lookup):
+    obj = cache.get(key)
+    if obj is None:
+        try:
+            obj = queryset.get(**lookup)
+        except queryset.model.DoesNotExist:
+            obj = MISSING
+            cache.set(key, obj, MISSING_TIMEOUT)
+        else:
+            cache.set(key, obj, CACHE_TIMEOUT)
+    if obj is MISSING:
+        raise Http404(f'No {queryset.model._meta.object_name} matches')
+    return obj
+
+
+def get_group_or_404(slug):
+    """Группа по slug из кеша; отсутствие группы тоже кешируется на
+    POSTS_RESOLVER_MISSING_TIMEOUT."""
+    return _resolve(group_key(slug), Group.objects.all(), slug=slug)
+
+
+def get_user_or_404(username):
+    """Пользователь по username из кеша, без связанных UserStats;
+    отсутствие пользователя тоже кешируется."""
+    return _resolve(user_key(username), User.objects.all(), username=username)
+
+
+def invalidate_groups(*slugs):
+    delete_on_commit(group_key(slug) for slug in slugs)
+
+
+def invalidate_users(*usernames):
+    delete_on_commit(user_key(username) for username in usernames)
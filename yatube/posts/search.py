@@ -0,0 +1,223 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Comment, Post
+from .paginators import CursorPage
+
+TABLE = 'posts_search_index'
+SEARCH_CONFIG = settings.POSTS_SEARCH_CONFIG
+MAX_OFFSET = settings.POSTS_SEARCH_MAX_OFFSET
+
+
+def post_doc_id(post_id):
+    return post_id * 2
+
+
+def comment_doc_id(comment_id):
+    return comment_id * 2 + 1
+
+
+class SearchBackend:
+    """Индекс документов поиска: сообщение (текст, название группы,
+    имя автора) и отдельно каждый комментарий к нему."""
+
+    def index_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove(self, doc_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def rebuild(self):
+        self.clear()
+        posts = Post.objects.select_related('author', 'group')
+        for post in posts.iterator():
+            self.index_post(post)
+        for comment in Comment.objects.iterator():
+            self.index_comment(comment)
+
+    def search(self, query, limit, offset=0):
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    def _upsert(self, doc_id, post_id, parts):
+        document = ' || '.join(
+            'setweight(to_tsvector(%s::regconfig, %s), %s)' for _ in parts
+        )
+        params = []
+        for text, weight in parts:
+            params.extend((SEARCH_CONFIG, text or '', weight))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {TABLE} (doc_id, post_id, document) '
+                f'VALUES (%s, %s, {document}) '
+                'ON CONFLICT (doc_id) DO UPDATE '
+                'SET document = EXCLUDED.document',
+                [doc_id, post_id, *params],
+            )
+
+    def index_post(self, post):
+        self._upsert(
+            post_doc_id(post.pk),
+            post.pk,
+            (
+                (post.text, 'A'),
+                (post.group.title if post.group_id else '', 'B'),
+                (post.author.username, 'B'),
+            ),
+        )
+
+    def index_comment(self, comment):
+        self._upsert(
+            comment_doc_id(comment.pk),
+            comment.post_id,
+            ((comment.text, 'C'),),
+        )
+
+    def remove(self, doc_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE doc_id = %s', [doc_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {TABLE}')
+
+    def search(self, query, limit, offset=0):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM {TABLE}, '
+                'websearch_to_tsquery(%s::regconfig, %s) AS query '
+                'WHERE document @@ query GROUP BY post_id '
+                'ORDER BY MAX(ts_rank(document, query)) DESC, post_id DESC '
+                'LIMIT %s OFFSET %s',
+                [SEARCH_CONFIG, query, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SqliteSearchBackend(SearchBackend):
+    """FTS5-индекс, rowid которого совпадает с doc_id."""
+
+    def _upsert(self, doc_id, post_id, **columns):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [doc_id])
+            cursor.execute(
+                f'INSERT INTO {TABLE} '
+                '(rowid, post_id, body, group_title, username, comment) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                [
+                    doc_id,
+                    post_id,
+                    columns.get('body', ''),
+                    columns.get('group_title', ''),
+                    columns.get('username', ''),
+                    columns.get('comment', ''),
+                ],
+            )
+
+    def index_post(self, post):
+        self._upsert(
+            post_doc_id(post.pk),
+            post.pk,
+            body=post.text,
+            group_title=post.group.title if post.group_id else '',
+            username=post.author.username,
+        )
+
+    def index_comment(self, comment):
+        self._upsert(
+            comment_doc_id(comment.pk), comment.post_id, comment=comment.text
+        )
+
+    def remove(self, doc_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [doc_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+
+    def search(self, query, limit, offset=0):
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT post_id FROM ('
+                'SELECT post_id, bm25('
+                f'{TABLE}, 0.0, 4.0, 2.0, 2.0, 1.0) AS rank FROM {TABLE} '
+                # LIMIT -1 не даёт SQLite развернуть подзапрос в агрегат,
+                # где вспомогательные функции FTS5 недоступны.
+                f'WHERE {TABLE} MATCH %s LIMIT -1) '
+                'GROUP BY post_id ORDER BY MIN(rank), post_id DESC '
+                'LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class LikeSearchBackend(SearchBackend):
+    """Запасной вариант для СУБД без полнотекстового индекса."""
+
+    def search(self, query, limit, offset=0):
+        condition = Q()
+        for term in query.split():
+            condition &= (
+                Q(text__icontains=term)
+                | Q(group__title__icontains=term)
+                | Q(author__username__icontains=term)
+                | Q(comments__text__icontains=term)
+            )
+        if not condition:
+            return []
+        post_ids = (
+            Post.objects.filter(condition)
+            .distinct()
+            .order_by('-pub_date', '-id')
+            .values_list('pk', flat=True)
+        )
+        return list(post_ids[offset : offset + limit])
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SqliteSearchBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, LikeSearchBackend)()
+
+
+def paginate_results(request, query, per_page):
+    """Страница результатов поиска по релевантности; курсор —
+    смещение в выдаче, не дальше POSTS_SEARCH_MAX_OFFSET."""
+    try:
+        offset = int(request.GET.get('cursor', 0))
+    except ValueError:
+        offset = 0
+    offset = min(max(offset, 0), MAX_OFFSET)
+    post_ids = get_backend().search(query, per_page + 1, offset)
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        post_ids[:per_page]
+    )
+    has_next = len(post_ids) > per_page and offset + per_page <= MAX_OFFSET
+    return CursorPage(
+        [
+            posts[post_id]
+            for post_id in post_ids[:per_page]
+            if post_id in posts
+        ],
+        next_cursor=str(offset + per_page) if has_next else None,
+        previous_cursor=str(max(offset - per_page, 0)) if offset else None,
+    )
@@ -0,0 +1,238 @@
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import feed_cache, images, resolvers, search
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+TRACKED_FIELDS = {
+    Group: ('title', 'slug'),
+    Post: ('group_id',),
+    User: ('username', 'first_name', 'last_name'),
+}
+
+
+def feed_scopes(author_ids, group_ids=()):
+    """Области кеша лент, где показываются сообщения авторов author_ids
+    из групп group_ids. Подписчики популярных авторов читают их
+    сообщения в обход материализованной ленты, поэтому их страницы
+    зависят от области автора и отдельно не сбрасываются."""
+    follower_ids = (
+        Follow.objects.filter(author_id__in=author_ids)
+        .exclude(author__stats__is_celebrity=True)
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+    return [
+        feed_cache.INDEX,
+        *map(feed_cache.group_scope, group_ids),
+        *map(feed_cache.author_scope, author_ids),
+        *map(feed_cache.follower_scope, follower_ids),
+    ]
+
+
+def invalidate_posts_feeds(posts):
+    rows = set(posts.values_list('pk', 'author_id', 'group_id'))
+    feed_cache.invalidate(
+        *feed_scopes(
+            {author_id for _, author_id, _ in rows},
+            {group_id for _, _, group_id in rows if group_id},
+        ),
+        *(feed_cache.post_scope(post_id) for post_id, _, _ in rows),
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    previous = getattr(instance, '_tracked', None) or {}
+    group_ids = {instance.group_id, previous.get('group_id')} - {None}
+    feed_cache.invalidate(
+        *feed_scopes({instance.author_id}, group_ids),
+        feed_cache.post_scope(instance.pk),
+        feed_cache.profile_scope(instance.author_id),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_post_page(sender, instance, **kwargs):
+    feed_cache.invalidate(feed_cache.post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feeds(sender, instance, created, **kwargs):
+    if not created:
+        feed_cache.invalidate(feed_cache.group_scope(instance.pk))
+        invalidate_posts_feeds(instance.group_post.all())
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, created, **kwargs):
+    # Страница сообщения зависит от области профиля автора, поэтому
+    # сбрасывать каждое сообщение по отдельности не нужно.
+    if created or not author_name_changed(instance):
+        return
+    group_ids = (
+        instance.posts.exclude(group=None)
+        .order_by()
+        .values_list('group_id', flat=True)
+        .distinct()
+    )
+    feed_cache.invalidate(
+        *feed_scopes({instance.pk}, set(group_ids)),
+        feed_cache.profile_scope(instance.pk),
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follower_feed(sender, instance, **kwargs):
+    feed_cache.invalidate(
+        feed_cache.follower_scope(instance.user_id),
+        feed_cache.profile_scope(instance.user_id),
+        feed_cache.profile_scope(instance.author_id),
+    )
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=User)
+def remember_tracked_fields(sender, instance, update_fields, **kwargs):
+    fields = TRACKED_FIELDS[sender]
+    instance._tracked = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(fields):
+        instance._tracked = {
+            field: getattr(instance, field) for field in fields
+        }
+        return
+    instance._tracked = (
+        sender.objects.filter(pk=instance.pk).values(*fields).first()
+    )
+
+
+@receiver(pre_save, sender=Post)
+def prepare_post_image(sender, instance, raw, **kwargs):
+    if not raw:
+        images.prepare_upload(instance)
+
+
+def tracked_field_changed(instance, field):
+    previous = getattr(instance, '_tracked', None)
+    return previous is None or previous[field] != getattr(instance, field)
+
+
+def author_name_changed(instance):
+    """Изменилось ли что-то из того, как автор подписан на страницах."""
+    return any(
+        tracked_field_changed(instance, field)
+        for field in TRACKED_FIELDS[User]
+    )
+
+
+def tracked_values(instance, field):
+    """Текущее и, если поле изменилось, прежнее значение field."""
+    previous = getattr(instance, '_tracked', None) or {}
+    return {getattr(instance, field), previous.get(field, None)} - {None}
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_resolver(sender, instance, **kwargs):
+    resolvers.invalidate_groups(*tracked_values(instance, 'slug'))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_resolver(sender, instance, **kwargs):
+    resolvers.invalidate_users(*tracked_values(instance, 'username'))
+
+
+def _reindex_posts(posts):
+    backend = search.get_backend()
+    for post in posts.select_related('author', 'group').iterator():
+        backend.index_post(post)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw, **kwargs):
+    if not raw:
+        search.get_backend().index_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw, **kwargs):
+    if not raw:
+        search.get_backend().index_comment(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    search.get_backend().remove(search.post_doc_id(instance.pk))
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_from_index(sender, instance, **kwargs):
+    search.get_backend().remove(search.comment_doc_id(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+def reindex_group_posts(sender, instance, created, raw, **kwargs):
+    if not created and not raw and tracked_field_changed(instance, 'title'):
+        _reindex_posts(instance.group_post.all())
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_posts(sender, instance, **kwargs):
+    instance._post_ids = list(instance.group_post.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def reindex_ungrouped_posts(sender, instance, **kwargs):
+    _reindex_posts(Post.objects.filter(pk__in=instance._post_ids))
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_ungrouped_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate(feed_cache.group_scope(instance.pk))
+    invalidate_posts_feeds(Post.objects.filter(pk__in=instance._post_ids))
+
+
+@receiver(post_save, sender=User)
+def reindex_user_posts(sender, instance, created, raw, **kwargs):
+    if not created and not raw and tracked_field_changed(instance, 'username'):
+        _reindex_posts(instance.posts.all())
+
+
+@receiver(post_save, sender=Group)
+def touch_group_post_cards(sender, instance, created, raw, **kwargs):
+    if not created and not raw and tracked_field_changed(instance, 'slug'):
+        instance.group_post.update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Group)
+def touch_ungrouped_post_cards(sender, instance, **kwargs):
+    # SET_NULL обновляет group_id без auto_now: без этого карточки
+    # ещё сутки ссылались бы на удалённую группу.
+    Post.objects.filter(pk__in=instance._post_ids).update(
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=User)
+def touch_author_post_cards(sender, instance, created, raw, **kwargs):
+    if not created and not raw and author_name_changed(instance):
+        instance.posts.update(updated_at=timezone.now())
@@ -0,0 +1,44 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .post_images import resolve_pictures
+
+register = template.Library()
+
+CACHE_KEY = 'post_card'
+CACHE_TIMEOUT = settings.POSTS_CARD_CACHE_TIMEOUT
+TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post, variant):
+    # updated_at меняется при любой правке сообщения, так что старые
+    # карточки не читаются и вытесняются по TTL.
+    return f'{CACHE_KEY}:{variant}:{post.pk}:{post.updated_at.isoformat()}'
+
+
+@register.simple_tag
+def post_cards(posts, variant='feed'):
+    """Отрисованные карточки сообщений страницы: готовые берутся
+    из кеша одним get_many, отрисовываются только недостающие, а их
+    миниатюры читаются из kvstore одним запросом."""
+    keys = {post.pk: card_key(post, variant) for post in posts}
+    cards = cache.get_many(keys.values())
+    stale = [post for post in posts if keys[post.pk] not in cards]
+    pictures = resolve_pictures(post.image for post in stale)
+    missing = {}
+    for post in stale:
+        key = keys[post.pk]
+        cards[key] = render_to_string(
+            TEMPLATE, {'post': post, 'variant': variant, 'pictures': pictures}
+        )
+        # Карточку без миниатюр не кешируем: после короткого сбоя
+        # хранилища или kvstore она осталась бы без изображения
+        # на весь CACHE_TIMEOUT.
+        if not post.image or post.image.name in pictures:
+            missing[key] = cards[key]
+    if missing:
+        cache.set_many(missing, timeout=CACHE_TIMEOUT)
+    return [mark_safe(cards[keys[post.pk]]) for post in posts]
@@ -0,0 +1,62 @@
+import logging
+
+from django import template
+
+from .. import thumbnails
+
+register = template.Library()
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {'AVIF': 'image/avif', 'WEBP': 'image/webp'}
+SIZES = f'(min-width: {thumbnails.WIDTH}px) {thumbnails.WIDTH}px, 100vw'
+
+
+def picture(resolved):
+    """Контекст picture.html из миниатюр одного изображения."""
+    sources = []
+    for fmt in thumbnails.supported_formats():
+        candidates = []
+        for width in thumbnails.WIDTHS:
+            geometry, options = thumbnails.variant(width, fmt)
+            thumbnail = resolved[geometry, fmt]
+            candidates.append(f'{thumbnail.url} {width}w')
+        sources.append(
+            {'type': MIME_TYPES[fmt], 'srcset': ', '.join(candidates)}
+        )
+    return {
+        'image': resolved[thumbnails.FALLBACK[0], None],
+        'sources': sources,
+        'sizes': SIZES,
+    }
+
+
+def resolve_pictures(images):
+    """{имя изображения: контекст picture.html} для всех непустых
+    images; метаданные миниатюр читаются одним запросом к kvstore."""
+    images = [image for image in images if image]
+    try:
+        resolved = thumbnails.resolve(images)
+    except Exception:
+        # Как и тег thumbnail, не роняем страницу из-за битого файла.
+        logger.exception('Не удалось подготовить миниатюры')
+        return {}
+    return {name: picture(items) for name, items in resolved.items()}
+
+
+@register.simple_tag
+def post_pictures(posts):
+    """Изображения сообщений страницы для post_picture."""
+    return resolve_pictures(post.image for post in posts)
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(image, lazy=True, pictures=None):
+    """<picture> изображения сообщения: варианты современных форматов
+    разной ширины в srcset и JPEG для остальных браузеров. Если
+    pictures уже получены через post_pictures, kvstore не читается."""
+    if not image:
+        return {'image': None}
+    if pictures is None or image.name not in pictures:
+        pictures = resolve_pictures([image])
+    context = pictures.get(image.name, {'image': None})
+    return {**context, 'lazy': lazy}
@@ -0,0 +1,99 @@
+import multiprocessing
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import feed_cache
+from ..models import Post, User
+
+TEMP_CACHE_ROOT = tempfile.mkdtemp()
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': TEMP_CACHE_ROOT,
+    }
+}
+# Боевая схема: L1 воркера перед общим файловым кешем. Опрос очереди
+# сообщений на каждом обращении, чтобы тесты не ждали POLL_INTERVAL.
+TWO_TIER_CACHES = {
+    'default': {
+        **settings.CACHES['default'],
+        'OPTIONS': {
+            **settings.CACHES['default']['OPTIONS'],
+            'POLL_INTERVAL': 0,
+        },
+    },
+    'shared': SHARED_CACHES['default'],
+}
+INDEX_VIEW = reverse('posts:index')
+
+
+def in_worker(target, *args):
+    """Выполняет target в отдельном процессе, как другой воркер
+    gunicorn, и возвращает код выхода."""
+    process = multiprocessing.get_context('fork').Process(
+        target=target, args=args
+    )
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+def read_index_page(url):
+    def build():
+        raise AssertionError('Страница собрана заново')
+
+    feed_cache.get_page(
+        RequestFactory().get(url), 'index', [feed_cache.INDEX], build
+    )
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class PostsSharedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+        Post.objects.create(author=cls.user, text='Привет, друг')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_posts_cache_values_are_shared_between_workers(self):
+        """Проверяем, что запись в кеш одного воркера видна другому."""
+        self.assertEqual(in_worker(cache.set, 'fsociety', 'Привет, друг'), 0)
+        self.assertEqual(cache.get('fsociety'), 'Привет, друг')
+
+    def test_posts_invalidation_in_worker_is_seen_by_others(self):
+        """Проверяем, что сброс ленты в одном воркере заставляет
+        другой воркер пересобрать страницу."""
+        self.guest_client.get(INDEX_VIEW)
+        self.guest_client.get(INDEX_VIEW)
+        self.assertEqual(feed_cache.stats('index')['hits'], 1)
+        self.assertEqual(in_worker(feed_cache.invalidate, feed_cache.INDEX), 0)
+        with self.assertNumQueries(1):
+            self.guest_client.get(INDEX_VIEW)
+        self.assertEqual(feed_cache.stats('index')['misses'], 2)
+
+    def test_posts_page_cached_by_worker_is_served_to_others(self):
+        """Проверяем, что страница, закешированная одним воркером,
+        отдаётся другому без пересборки."""
+        self.guest_client.get(INDEX_VIEW)
+        self.assertEqual(in_worker(read_index_page, INDEX_VIEW), 0)
+        self.assertEqual(feed_cache.stats('index')['hits'], 1)
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class PostsTwoTierSharedCacheTests(PostsSharedCacheTests):
+    """Те же проверки для TwoTierCache: L1 каждого воркера должен
+    узнавать о чужих изменениях через общий кеш."""
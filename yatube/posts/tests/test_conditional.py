@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import conditional, timeline
+from ..models import Comment, Follow, Group, Post, User
+
+INDEX_VIEW = reverse('posts:index')
+FOLLOW_INDEX_VIEW = reverse('posts:follow_index')
+
+
+class PostsConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='elliot')
+        cls.reader = User.objects.create_user(username='darlene')
+        cls.group = Group.objects.create(
+            title='Мистер робот', slug='mr-robot', description='fsociety'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Привет, друг', group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        timeline.backfill(cls.reader, cls.author)
+        cls.GROUP_VIEW = reverse('posts:group_list', args=(cls.group.slug,))
+        cls.PROFILE_VIEW = reverse('posts:profile', args=(cls.author,))
+        cls.POST_DETAIL_VIEW = reverse(
+            'posts:post_detail', args=(cls.post.pk,)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def revalidate(self, client, url):
+        """Повторно запрашивает url с ETag первого ответа."""
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_posts_views_answer_not_modified(self):
+        """Проверяем, что ленты и страница сообщения отвечают 304
+        на запрос с актуальным ETag и считают такие ответы."""
+        views_config = (
+            (self.guest_client, INDEX_VIEW, 'index'),
+            (self.guest_client, self.GROUP_VIEW, 'group'),
+            (self.guest_client, self.PROFILE_VIEW, 'profile'),
+            (self.guest_client, self.POST_DETAIL_VIEW, 'post_detail'),
+            (self.reader_client, FOLLOW_INDEX_VIEW, 'follow'),
+        )
+        for client, url, name in views_config:
+            with self.subTest(url=url):
+                response = self.revalidate(client, url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertIn('Last-Modified', response)
+                self.assertEqual(conditional.stats(name)['hit_rate'], 0.5)
+
+    def test_posts_index_not_modified_without_queries(self):
+        """Проверяем, что ответ 304 не обращается к базе."""
+        etag = self.guest_client.get(INDEX_VIEW)['ETag']
+        with self.assertNumQueries(0):
+            self.guest_client.get(INDEX_VIEW, HTTP_IF_NONE_MATCH=etag)
+
+    def test_posts_changes_refresh_validators(self):
+        """Проверяем, что ETag меняется после нового сообщения,
+        комментария и подписки, а также для другого зрителя."""
+        changes_config = (
+            (
+                self.guest_client,
+                INDEX_VIEW,
+                lambda: Post.objects.create(
+                    author=self.reader, text='Контроль — это иллюзия'
+                ),
+            ),
+            (
+                self.guest_client,
+                self.POST_DETAIL_VIEW,
+                lambda: Comment.objects.create(
+                    post=self.post, author=self.reader, text='fsociety'
+                ),
+            ),
+            (
+                self.guest_client,
+                self.PROFILE_VIEW,
+                lambda: Follow.objects.filter(user=self.reader).delete(),
+            ),
+            (
+                self.guest_client,
+                self.GROUP_VIEW,
+                lambda: self.guest_client.force_login(self.reader),
+            ),
+        )
+        for client, url, change in changes_config:
+            with self.subTest(url=url):
+                etag = client.get(url)['ETag']
+                change()
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, User, UserStats
+
+POST_CREATE_VIEW = reverse('posts:post_create')
+
+
+class PostsCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='elliot')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.post = Post.objects.create(author=cls.author, text='Привет')
+        cls.PROFILE_FOLLOW_VIEW = reverse(
+            'posts:profile_follow', kwargs={'username': cls.author.username}
+        )
+        cls.PROFILE_UNFOLLOW_VIEW = reverse(
+            'posts:profile_unfollow', kwargs={'username': cls.author.username}
+        )
+        cls.POST_COMMENT_VIEW = reverse(
+            'posts:add_comment', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_posts_counters_follow_and_unfollow(self):
+        """Подписка и отписка меняют счётчики подписчиков и подписок,
+        повторная подписка их не меняет."""
+        self.follower_client.get(self.PROFILE_FOLLOW_VIEW)
+        self.follower_client.get(self.PROFILE_FOLLOW_VIEW)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.follower).following_count, 1)
+        self.follower_client.get(self.PROFILE_UNFOLLOW_VIEW)
+        self.follower_client.get(self.PROFILE_UNFOLLOW_VIEW)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.follower).following_count, 0)
+
+    def test_posts_counters_post_and_comment(self):
+        """Новое сообщение и новый комментарий увеличивают счётчики."""
+        posts_count = self.stats(self.author).posts_count
+        self.author_client.post(POST_CREATE_VIEW, data={'text': 'Ещё'})
+        self.assertEqual(self.stats(self.author).posts_count, posts_count + 1)
+        self.follower_client.post(
+            self.POST_COMMENT_VIEW, data={'text': 'Контроль — это иллюзия'}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_posts_counters_reconcile_command(self):
+        """Команда reconcile_counters исправляет разошедшиеся счётчики."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Comment.objects.create(
+            post=self.post, author=self.follower, text='Мимо счётчика'
+        )
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        UserStats.objects.filter(user=self.follower).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.follower).following_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
@@ -0,0 +1,70 @@
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import estimates
+from ..models import Post, User
+
+INDEX_VIEW = reverse('posts:index')
+ADMIN_POSTS_VIEW = reverse('admin:posts_post_changelist')
+
+
+class PostsEstimatedCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Привет, {num}й друг')
+            for num in range(20)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_posts_count_is_exact_below_threshold(self):
+        """Проверяем, что ниже порога число сообщений точное."""
+        count = estimates.count(Post.objects.all())
+        self.assertEqual(count, 20)
+        self.assertFalse(getattr(count, 'estimated', False))
+        Post.objects.create(author=self.user, text='Контроль — это иллюзия')
+        self.assertEqual(estimates.count(Post.objects.all()), 21)
+
+    @override_settings(PAGINATOR_COUNT_ESTIMATE_THRESHOLD=10)
+    def test_posts_count_is_estimated_above_threshold(self):
+        """Проверяем, что выше порога число берётся из кеша без COUNT(*)
+        и помечается как оценка."""
+        estimates.count(Post.objects.all())
+        Post.objects.create(author=self.user, text='Контроль — это иллюзия')
+        with self.assertNumQueries(0):
+            count = estimates.count(Post.objects.all())
+        self.assertEqual(count, 20)
+        self.assertTrue(count.estimated)
+
+    @override_settings(PAGINATOR_COUNT_ESTIMATE_THRESHOLD=10)
+    def test_posts_paginator_shows_estimated_count(self):
+        """Проверяем, что нумерованный пагинатор показывает оценку."""
+        estimates.count(Post.objects.all())
+        response = self.guest_client.get(INDEX_VIEW, {'page': 2})
+        self.assertTrue(response.context['page_obj'].paginator.count.estimated)
+        self.assertContains(response, 'Всего сообщений: ~20')
+
+    def test_posts_admin_uses_estimated_count_paginator(self):
+        """Проверяем, что список сообщений в админке считает строки
+        через оценку и без второго полного COUNT(*)."""
+        admin_client = Client()
+        admin_client.force_login(
+            User.objects.create_superuser('darlene', 'd@fsociety.org', 'pw')
+        )
+        response = admin_client.get(ADMIN_POSTS_VIEW)
+        model_admin = site._registry[Post]
+        self.assertIs(
+            response.context['cl'].paginator.__class__,
+            model_admin.paginator,
+        )
+        self.assertFalse(model_admin.show_full_result_count)
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import counters, timeline
+from ..models import Comment, Follow, Group, Post, User
+from .utils import QueryPlanMixin
+
+INDEX_VIEW = reverse('posts:index')
+FOLLOW_INDEX_VIEW = reverse('posts:follow_index')
+
+
+class PostsQueryPlanTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='elliot')
+        cls.reader = User.objects.create_user(username='darlene')
+        cls.group = Group.objects.create(
+            title='Мистер робот',
+            slug='mr-robot',
+            description='Сделать мир лучше',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Привет, друг', group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Контроль — это иллюзия'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        timeline.backfill(cls.reader, cls.author)
+        counters.reconcile()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_posts_views_read_feeds_by_index(self):
+        """Проверяем, что ленты и комментарии читаются по составным
+        индексам без сортировки всей выборки."""
+        views_config = (
+            (self.guest_client, INDEX_VIEW),
+            (
+                self.guest_client,
+                reverse('posts:group_list', args=(self.group.slug,)),
+            ),
+            (
+                self.guest_client,
+                reverse('posts:profile', args=(self.author.username,)),
+            ),
+            (
+                self.guest_client,
+                reverse('posts:post_detail', args=(self.post.pk,)),
+            ),
+            (self.reader_client, FOLLOW_INDEX_VIEW),
+        )
+        for client, view in views_config:
+            with self.subTest(view=view):
+                self.assertIndexedOrdering(client, view)
+
+    @override_settings(TIMELINE_CELEBRITY_THRESHOLD=1)
+    def test_posts_follow_celebrity_source_reads_by_index(self):
+        """Проверяем, что сообщения популярных авторов подмешиваются
+        в ленту подписок по индексу автора."""
+        self.assertIndexedOrdering(self.reader_client, FOLLOW_INDEX_VIEW)
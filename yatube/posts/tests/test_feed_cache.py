@@ -0,0 +1,201 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import feed_cache
+from ..models import Follow, Group, Post, User
+
+INDEX_VIEW = reverse('posts:index')
+FOLLOW_INDEX_VIEW = reverse('posts:follow_index')
+
+
+class PostsScopedFeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='elliot')
+        cls.other_author = User.objects.create_user(username='tyrell')
+        cls.reader = User.objects.create_user(username='darlene')
+        cls.other_reader = User.objects.create_user(username='angela')
+        cls.group = Group.objects.create(
+            title='Мистер робот', slug='mr-robot', description='fsociety'
+        )
+        cls.other_group = Group.objects.create(
+            title='Корпорация зла', slug='e-corp', description='E Corp'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.other_reader, author=cls.other_author)
+        cls.GROUP_VIEW = reverse('posts:group_list', args=(cls.group.slug,))
+        cls.OTHER_GROUP_VIEW = reverse(
+            'posts:group_list', args=(cls.other_group.slug,)
+        )
+        cls.PROFILE_VIEW = reverse('posts:profile', args=(cls.author,))
+        cls.OTHER_PROFILE_VIEW = reverse(
+            'posts:profile', args=(cls.other_author,)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.other_reader_client = Client()
+        self.other_reader_client.force_login(self.other_reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def is_cached(self, client, url, name):
+        """Открывает url и сообщает, отдана ли лента name из кеша."""
+        hits = feed_cache.stats(name)['hits']
+        client.get(url)
+        return feed_cache.stats(name)['hits'] > hits
+
+    def warm(self):
+        feeds = (
+            (self.guest_client, INDEX_VIEW),
+            (self.guest_client, self.GROUP_VIEW),
+            (self.guest_client, self.OTHER_GROUP_VIEW),
+            (self.guest_client, self.PROFILE_VIEW),
+            (self.guest_client, self.OTHER_PROFILE_VIEW),
+            (self.reader_client, FOLLOW_INDEX_VIEW),
+            (self.other_reader_client, FOLLOW_INDEX_VIEW),
+        )
+        for client, url in feeds:
+            client.get(url)
+
+    def assertFeedsCached(self, feeds_config):
+        for (client, url, name), cached in feeds_config.items():
+            with self.subTest(url=url, client=client):
+                self.assertIs(self.is_cached(client, url, name), cached)
+
+    def test_posts_new_post_invalidates_only_affected_feeds(self):
+        """Проверяем, что новое сообщение сбрасывает главную ленту, ленты
+        своей группы, автора и его подписчиков, но не остальные."""
+        self.warm()
+        Post.objects.create(
+            author=self.author, text='Привет, друг', group=self.group
+        )
+        self.assertFeedsCached(
+            {
+                (self.guest_client, INDEX_VIEW, 'index'): False,
+                (self.guest_client, self.GROUP_VIEW, 'group'): False,
+                (self.guest_client, self.OTHER_GROUP_VIEW, 'group'): True,
+                (self.guest_client, self.PROFILE_VIEW, 'profile'): False,
+                (self.guest_client, self.OTHER_PROFILE_VIEW, 'profile'): True,
+                (self.reader_client, FOLLOW_INDEX_VIEW, 'follow'): False,
+                (self.other_reader_client, FOLLOW_INDEX_VIEW, 'follow'): True,
+            }
+        )
+
+    def test_posts_moved_post_invalidates_both_groups(self):
+        """Проверяем, что перенос сообщения в другую группу сбрасывает
+        ленты обеих групп."""
+        post = Post.objects.create(
+            author=self.author, text='Привет, друг', group=self.group
+        )
+        self.warm()
+        post.group = self.other_group
+        post.save()
+        self.assertFeedsCached(
+            {
+                (self.guest_client, self.GROUP_VIEW, 'group'): False,
+                (self.guest_client, self.OTHER_GROUP_VIEW, 'group'): False,
+                (self.guest_client, self.OTHER_PROFILE_VIEW, 'profile'): True,
+            }
+        )
+
+    def test_posts_group_feeds_do_not_share_cache_entry(self):
+        """Проверяем, что ленты групп с совпавшими поколениями не делят
+        одну запись кеша."""
+        Post.objects.create(
+            author=self.author, text='Привет, друг', group=self.group
+        )
+        for group in (self.group, self.other_group):
+            scope = feed_cache.group_scope(group.pk)
+            cache.set(f'{feed_cache.GENERATION_KEY}:{scope}', 1, None)
+        self.guest_client.get(self.GROUP_VIEW)
+        self.assertFalse(
+            self.is_cached(self.guest_client, self.OTHER_GROUP_VIEW, 'group')
+        )
+        response = self.guest_client.get(self.OTHER_GROUP_VIEW)
+        self.assertNotContains(response, 'Привет, друг')
+
+    def test_posts_follow_invalidates_only_follower_feed(self):
+        """Проверяем, что подписка сбрасывает только ленту подписчика."""
+        self.warm()
+        self.other_reader_client.get(
+            reverse('posts:profile_follow', args=(self.author,))
+        )
+        self.assertFeedsCached(
+            {
+                (self.other_reader_client, FOLLOW_INDEX_VIEW, 'follow'): False,
+                (self.reader_client, FOLLOW_INDEX_VIEW, 'follow'): True,
+                (self.guest_client, INDEX_VIEW, 'index'): True,
+            }
+        )
+
+    def test_posts_login_does_not_invalidate_feeds(self):
+        """Проверяем, что обновление last_login при входе не сбрасывает
+        ленты, а переименование автора сбрасывает его ленты."""
+        self.warm()
+        self.client.force_login(self.author)
+        self.assertTrue(self.is_cached(self.guest_client, INDEX_VIEW, 'index'))
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Эллиот'
+        author.save()
+        self.assertFeedsCached(
+            {
+                (self.guest_client, self.PROFILE_VIEW, 'profile'): False,
+                (self.guest_client, self.OTHER_PROFILE_VIEW, 'profile'): True,
+            }
+        )
+
+    def test_posts_password_change_does_not_invalidate_feeds(self):
+        """Проверяем, что смена пароля не сбрасывает ленты и страницы
+        сообщений автора, а переименование сбрасывает область профиля,
+        от которой зависят его сообщения, не трогая каждое из них."""
+        post = Post.objects.create(author=self.author, text='Привет, друг')
+        scopes = (
+            feed_cache.INDEX,
+            feed_cache.author_scope(self.author.pk),
+            feed_cache.profile_scope(self.author.pk),
+            feed_cache.post_scope(post.pk),
+        )
+        before = dict(zip(scopes, feed_cache.generations(scopes)))
+        author = User.objects.get(pk=self.author.pk)
+        author.set_password('fsociety00.dat')
+        author.is_active = False
+        author.save()
+        self.assertEqual(
+            dict(zip(scopes, feed_cache.generations(scopes))), before
+        )
+        author.last_name = 'Олдерсон'
+        author.save()
+        after = dict(zip(scopes, feed_cache.generations(scopes)))
+        for scope in scopes[:3]:
+            with self.subTest(scope=scope):
+                self.assertNotEqual(after[scope], before[scope])
+        self.assertEqual(
+            after[feed_cache.post_scope(post.pk)],
+            before[feed_cache.post_scope(post.pk)],
+        )
+
+
+class PostsFeedCacheCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='elliot')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_posts_generation_dropped_again_after_commit(self):
+        """Поколение, которое параллельный запрос заново заполнил
+        до фиксации транзакции с новым сообщением, сбрасывается
+        после неё."""
+        with transaction.atomic():
+            Post.objects.create(author=self.author, text='Новость')
+            stale = feed_cache.generations([feed_cache.INDEX])
+        self.assertNotEqual(feed_cache.generations([feed_cache.INDEX]), stale)
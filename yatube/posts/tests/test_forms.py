@@ -23,7 +23,7 @@ PIXEL = (
 NOT_A_PIXEL = b''
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
 class PostsFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -99,7 +99,7 @@ class PostsFormTests(TestCase):
                 author=self.post.author,
                 text=self.post.text,
                 group=self.post.group.pk,
-                image='posts/test_pixel.gif',
+                image=self.post.image.name,
             ).exists(),
             Post.objects.latest('pub_date'),
         )
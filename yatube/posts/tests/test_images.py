@@ -0,0 +1,210 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import images
+from ..models import Post, User, sharded_image_path
+
+POST_CREATE_VIEW = reverse('posts:post_create')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def picture(name, color=(255, 0, 0), size=(4, 2)):
+    content = BytesIO()
+    Image.new('RGB', size, color).save(content, 'PNG')
+    return SimpleUploadedFile(
+        name=name, content=content.getvalue(), content_type='image/png'
+    )
+
+
+def stored_files():
+    found = []
+    for root, _, files in os.walk(os.path.join(TEMP_MEDIA_ROOT, 'posts')):
+        found.extend(
+            os.path.relpath(os.path.join(root, name), TEMP_MEDIA_ROOT)
+            for name in files
+        )
+    return sorted(found)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class PostsImageMetadataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_posts_upload_fills_image_metadata(self):
+        """Проверяем, что при загрузке сохраняются размеры и хеш
+        иллюстрации."""
+        self.authorized_client.post(
+            POST_CREATE_VIEW,
+            data={'text': 'Привет', 'image': picture('a.png', size=(6, 3))},
+        )
+        post = Post.objects.get(author=self.user)
+        self.assertEqual((post.image_width, post.image_height), (6, 3))
+        self.assertEqual(len(post.image_hash), 64)
+
+    def test_posts_identical_uploads_share_file(self):
+        """Проверяем, что одинаковые иллюстрации хранятся одним файлом,
+        а разные — отдельными."""
+        for name, color in (
+            ('a.png', 'red'),
+            ('b.png', 'red'),
+            ('c.png', 'blue'),
+        ):
+            Post.objects.create(
+                author=self.user, text=name, image=picture(name, color)
+            )
+        first, second, third = Post.objects.order_by('pk')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertNotEqual(third.image.name, first.image.name)
+        self.assertEqual(
+            stored_files(), sorted((first.image.name, third.image.name))
+        )
+
+    def test_posts_upload_replaces_truncated_copy(self):
+        """Проверяем, что загрузка не ссылается на оборванную копию,
+        лежащую по шардированному пути, а сохраняет файл заново."""
+        upload = picture('a.png')
+        content = upload.read()
+        name = sharded_image_path(
+            hashlib.sha256(content).hexdigest(), upload.name
+        )
+        os.makedirs(os.path.dirname(os.path.join(TEMP_MEDIA_ROOT, name)))
+        with open(os.path.join(TEMP_MEDIA_ROOT, name), 'wb') as file:
+            file.write(content[:8])
+        post = Post.objects.create(author=self.user, text='a', image=upload)
+        self.assertEqual(post.image.name, name)
+        with open(post.image.path, 'rb') as file:
+            self.assertEqual(file.read(), content)
+
+    def test_posts_backfill_image_metadata(self):
+        """Проверяем, что команда порциями заполняет метаданные старых
+        сообщений и с --dedupe удаляет одинаковые файлы."""
+        for name, color in (
+            ('a.png', 'red'),
+            ('b.png', 'green'),
+            ('c.png', 'blue'),
+        ):
+            Post.objects.create(
+                author=self.user, text=name, image=picture(name, color)
+            )
+        # Старые сообщения без метаданных, два файла из трёх одинаковые.
+        Post.objects.update(image_hash='', image_width=None, image_height=None)
+        first, second, third = Post.objects.order_by('pk')
+        shutil.copy(first.image.path, second.image.path)
+        out = StringIO()
+        call_command(
+            'backfill_image_metadata', chunk_size=2, dedupe=True, stdout=out
+        )
+        self.assertIn('Заполнено иллюстраций: 3', out.getvalue())
+        self.assertIn('Удалено копий файлов: 1', out.getvalue())
+        self.assertFalse(Post.objects.filter(image_hash='').exists())
+        self.assertEqual(
+            set(Post.objects.values_list('image', flat=True)),
+            {first.image.name, third.image.name},
+        )
+        self.assertEqual(
+            stored_files(), sorted((first.image.name, third.image.name))
+        )
+
+    def test_posts_cleared_image_is_not_deduplicated(self):
+        """Проверяем, что у сообщения, иллюстрацию которого убрали
+        в форме, сбрасываются метаданные, и дедупликация не переводит
+        остальные сообщения на пустое имя."""
+        for name, color in (
+            ('a.png', 'red'),
+            ('b.png', 'green'),
+            ('c.png', 'blue'),
+        ):
+            Post.objects.create(
+                author=self.user, text=name, image=picture(name, color)
+            )
+        cleared, second, third = Post.objects.order_by('pk')
+        for post in (second, third):
+            shutil.copy(cleared.image.path, post.image.path)
+        shared_hash = cleared.image_hash
+        Post.objects.update(image_hash=shared_hash)
+        # Django не удаляет файл, когда иллюстрацию убирают из формы.
+        kept = sorted((cleared.image.name, second.image.name))
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(cleared.pk,)),
+            data={'text': 'Без картинки', 'image-clear': 'on'},
+        )
+        cleared.refresh_from_db()
+        self.assertEqual(cleared.image.name, '')
+        self.assertEqual(
+            (cleared.image_hash, cleared.image_width, cleared.image_height),
+            ('', None, None),
+        )
+        # Сообщения, сохранённые до исправления, сохранили старый хеш.
+        Post.objects.filter(pk=cleared.pk).update(image_hash=shared_hash)
+        self.assertEqual(images.deduplicate(), 1)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('image', flat=True)),
+            ['', second.image.name, second.image.name],
+        )
+        self.assertEqual(stored_files(), kept)
+
+    def test_posts_shard_media_moves_flat_files(self):
+        """Проверяем, что команда переносит файлы из плоского posts/
+        в шардированные каталоги, переписывает ссылки, не доверяет
+        оборванной копии и при повторном запуске ничего не делает."""
+        posts = []
+        for name, color in (('a.png', 'red'), ('b.png', 'green')):
+            post = Post.objects.create(
+                author=self.user, text=name, image=picture(name, color)
+            )
+            flat = f'posts/{name}'
+            os.replace(post.image.path, os.path.join(TEMP_MEDIA_ROOT, flat))
+            posts.append((post, post.image.name))
+        Post.objects.filter(text='a.png').update(image='posts/a.png')
+        Post.objects.filter(text='b.png').update(
+            image='posts/b.png', image_hash=''
+        )
+        first_sharded = posts[0][1]
+        with open(os.path.join(TEMP_MEDIA_ROOT, first_sharded), 'wb') as file:
+            file.write(b'\x89PNG')
+        out = StringIO()
+        call_command(
+            'shard_media',
+            batch_size=1,
+            workers=0,
+            delete_old=True,
+            stdout=out,
+        )
+        self.assertIn('Перенесено: 2', out.getvalue())
+        self.assertIn('удалено старых файлов: 2', out.getvalue())
+        for post, sharded in posts:
+            with self.subTest(post=post.text):
+                post.refresh_from_db()
+                self.assertEqual(post.image.name, sharded)
+                self.assertEqual(len(post.image_hash), 64)
+        self.assertEqual(
+            stored_files(), sorted(sharded for _, sharded in posts)
+        )
+        with open(os.path.join(TEMP_MEDIA_ROOT, first_sharded), 'rb') as file:
+            self.assertGreater(len(file.read()), 4)
+        out = StringIO()
+        call_command('shard_media', workers=0, stdout=out)
+        self.assertIn('Перенесено: 0', out.getvalue())
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..templatetags.post_cards import card_key
+
+INDEX_VIEW = reverse('posts:index')
+CACHED_CARD = '<p>Карточка из кеша</p>'
+
+
+class PostsCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+        cls.group = Group.objects.create(
+            title='Мистер робот', slug='mr-robot', description='fsociety'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            author=self.user, text='Привет, друг', group=self.group
+        )
+        self.PROFILE_VIEW = reverse('posts:profile', args=(self.user,))
+        self.GROUP_VIEW = reverse('posts:group_list', args=(self.group.slug,))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_posts_feeds_render_cached_cards(self):
+        """Проверяем, что ленты берут отрисованную карточку из кеша
+        по ключу (вариант, id, updated_at)."""
+        views_config = {
+            INDEX_VIEW: 'feed',
+            self.GROUP_VIEW: 'group',
+            self.PROFILE_VIEW: 'profile',
+        }
+        for view, variant in views_config.items():
+            with self.subTest(view=view):
+                self.guest_client.get(view)
+                key = card_key(self.post, variant)
+                self.assertIn('Привет, друг', cache.get(key))
+                cache.set(key, CACHED_CARD)
+                self.assertContains(self.guest_client.get(view), CACHED_CARD)
+
+    def test_posts_card_key_follows_post_edit(self):
+        """Проверяем, что правка сообщения меняет ключ карточки."""
+        self.guest_client.get(INDEX_VIEW)
+        cache.set(card_key(self.post, 'feed'), CACHED_CARD)
+        self.post.text = 'Контроль — это иллюзия'
+        self.post.save()
+        response = self.guest_client.get(INDEX_VIEW)
+        self.assertNotContains(response, CACHED_CARD)
+        self.assertContains(response, 'Контроль — это иллюзия')
+
+    def test_posts_card_follows_author_and_group_changes(self):
+        """Проверяем, что смена имени автора или адреса группы
+        обновляет карточки их сообщений."""
+        self.guest_client.get(INDEX_VIEW)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Эллиот'
+        user.save()
+        self.assertContains(self.guest_client.get(INDEX_VIEW), 'Эллиот')
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'fsociety'
+        group.save()
+        self.assertContains(
+            self.guest_client.get(INDEX_VIEW),
+            reverse('posts:group_list', args=('fsociety',)),
+        )
+
+    def test_posts_card_drops_deleted_group_link(self):
+        """Проверяем, что удаление группы обновляет карточки её
+        сообщений и они больше не ссылаются на группу."""
+        self.assertContains(self.guest_client.get(INDEX_VIEW), self.GROUP_VIEW)
+        Group.objects.get(pk=self.group.pk).delete()
+        response = self.guest_client.get(INDEX_VIEW)
+        self.assertContains(response, 'Привет, друг')
+        self.assertNotContains(response, self.GROUP_VIEW)
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from users.backends import CachedModelBackend
+
+from .. import resolvers, timeline
+from ..models import Comment, Follow, Group, Post, User
+from .utils import QueryBudgetMixin
+
+INDEX_VIEW = reverse('posts:index')
+FOLLOW_INDEX_VIEW = reverse('posts:follow_index')
+OBJECTS_PER_PAGE = settings.PAGINATOR_SLICING_CONFIG
+
+
+class PostsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='elliot')
+        cls.reader = User.objects.create_user(username='darlene')
+        cls.group = Group.objects.create(
+            title='Мистер робот',
+            slug='mr-robot',
+            description='Сделать мир лучше',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Привет, друг', group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        timeline.backfill(cls.reader, cls.author)
+        cls.GROUP_VIEW = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.PROFILE_VIEW = reverse(
+            'posts:profile', kwargs={'username': cls.author.username}
+        )
+        cls.POST_DETAIL_VIEW = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        # Замеряем запросы при прогретых кешах request.user, групп
+        # и профилей.
+        for user in (self.reader, self.author):
+            CachedModelBackend().get_user(user.pk)
+            resolvers.get_user_or_404(user.username)
+        resolvers.get_group_or_404(self.group.slug)
+
+    def add_posts(self):
+        for num in range(OBJECTS_PER_PAGE):
+            group = Group.objects.create(
+                title=f'Группа {num}',
+                slug=f'group-{num}',
+                description='Сделать мир лучше',
+            )
+            Post.objects.create(
+                author=self.author, text=f'Привет, {num}й друг', group=group
+            )
+
+    def add_posts_from_many_authors(self):
+        for num in range(OBJECTS_PER_PAGE):
+            author = User.objects.create_user(username=f'author_{num}')
+            self.reader_client.get(
+                reverse('posts:profile_follow', args=(author.username,))
+            )
+            author_client = Client()
+            author_client.force_login(author)
+            author_client.post(
+                reverse('posts:post_create'),
+                data={'text': f'Привет, {num}й друг', 'group': self.group.pk},
+            )
+
+    def add_comments(self):
+        for num in range(OBJECTS_PER_PAGE):
+            Comment.objects.create(
+                post=self.post,
+                author=User.objects.create_user(username=f'commenter_{num}'),
+                text=f'Комментарий {num}',
+            )
+
+    def test_posts_views_fit_query_budget(self):
+        """Проверяем, что ленты и страница сообщения укладываются
+        в бюджет SQL-запросов."""
+        views_config = (
+            (self.guest_client, INDEX_VIEW, 1),
+            (self.guest_client, self.GROUP_VIEW, 2),
+            (self.guest_client, self.PROFILE_VIEW, 2),
+            (self.guest_client, self.POST_DETAIL_VIEW, 2),
+            (self.reader_client, FOLLOW_INDEX_VIEW, 5),
+        )
+        for client, view, budget in views_config:
+            with self.subTest(view=view):
+                self.assertQueryBudget(client, view, budget)
+
+    def test_posts_index_queries_do_not_grow_with_page_size(self):
+        """Число SQL-запросов главной ленты не растёт вместе с числом
+        сообщений на странице."""
+        self.assertQueriesDoNotGrow(
+            self.guest_client, INDEX_VIEW, self.add_posts_from_many_authors
+        )
+
+    def test_posts_group_queries_do_not_grow_with_page_size(self):
+        """Число SQL-запросов ленты группы не растёт вместе с числом
+        сообщений на странице."""
+        self.assertQueriesDoNotGrow(
+            self.guest_client,
+            self.GROUP_VIEW,
+            self.add_posts_from_many_authors,
+        )
+
+    def test_posts_profile_queries_do_not_grow_with_page_size(self):
+        """Число SQL-запросов ленты профиля не растёт вместе с числом
+        сообщений на странице."""
+        self.assertQueriesDoNotGrow(
+            self.guest_client, self.PROFILE_VIEW, self.add_posts
+        )
+
+    def test_posts_follow_queries_do_not_grow_with_page_size(self):
+        """Число SQL-запросов ленты подписок не растёт вместе с числом
+        сообщений на странице."""
+        self.assertQueriesDoNotGrow(
+            self.reader_client,
+            FOLLOW_INDEX_VIEW,
+            self.add_posts_from_many_authors,
+        )
+
+    def test_posts_detail_queries_do_not_grow_with_comments(self):
+        """Число SQL-запросов страницы сообщения не растёт вместе
+        с числом комментариев."""
+        self.assertQueriesDoNotGrow(
+            self.guest_client, self.POST_DETAIL_VIEW, self.add_comments
+        )
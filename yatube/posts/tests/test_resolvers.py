@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import resolvers
+from ..models import Group, User
+
+
+class PostsResolverTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+        cls.group = Group.objects.create(
+            title='Мистер робот', slug='mr-robot', description='fsociety'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_posts_resolver_caches_found_objects(self):
+        """Проверяем, что найденные группа и пользователь повторно
+        берутся из кеша."""
+        resolvers.get_group_or_404(self.group.slug)
+        resolvers.get_user_or_404(self.user.username)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                resolvers.get_group_or_404(self.group.slug), self.group
+            )
+            self.assertEqual(
+                resolvers.get_user_or_404(self.user.username), self.user
+            )
+
+    def test_posts_resolver_caches_not_found(self):
+        """Проверяем, что повторный запрос несуществующего профайла
+        отвечает 404 без обращения к БД."""
+        for path in (
+            reverse('posts:profile', args=('whiterose',)),
+            reverse('posts:group_list', args=('dark-army',)),
+        ):
+            with self.subTest(path=path):
+                response = self.guest_client.get(path)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(path)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_posts_resolver_invalidated_on_create(self):
+        """Проверяем, что созданные группа и пользователь сразу видны,
+        даже если их отсутствие было закешировано."""
+        for resolve in (resolvers.get_group_or_404, resolvers.get_user_or_404):
+            with self.assertRaises(Http404):
+                resolve('whiterose')
+        Group.objects.create(title='Тёмная армия', slug='whiterose')
+        user = User.objects.create_user(username='whiterose')
+        self.assertEqual(
+            resolvers.get_group_or_404('whiterose').title, 'Тёмная армия'
+        )
+        self.assertEqual(resolvers.get_user_or_404('whiterose'), user)
+
+    def test_posts_resolver_invalidated_on_rename(self):
+        """Проверяем, что после переименования старое имя отвечает 404,
+        а новое — обновлённым объектом."""
+        resolvers.get_group_or_404(self.group.slug)
+        resolvers.get_user_or_404(self.user.username)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'fsociety'
+        group.title = 'fsociety'
+        group.save()
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'mr-robot'
+        user.save()
+        for resolve, old, new, obj in (
+            (resolvers.get_group_or_404, 'mr-robot', 'fsociety', group),
+            (resolvers.get_user_or_404, 'elliot', 'mr-robot', user),
+        ):
+            with self.subTest(new=new):
+                with self.assertRaises(Http404):
+                    resolve(old)
+                self.assertEqual(resolve(new), obj)
+        self.assertEqual(
+            resolvers.get_group_or_404('fsociety').title, 'fsociety'
+        )
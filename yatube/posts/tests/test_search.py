@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Group, Post, User
+
+SEARCH_VIEW = reverse('posts:search')
+OBJECTS_PER_PAGE = settings.PAGINATOR_SLICING_CONFIG
+
+
+class PostsSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+        cls.group = Group.objects.create(
+            title='Мистер робот',
+            slug='mr-robot',
+            description='Сделать мир лучше',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Контроль — это иллюзия',
+            group=cls.group,
+        )
+        cls.other_post = Post.objects.create(
+            author=User.objects.create_user(username='darlene'),
+            text='Привет, друг',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        response = self.guest_client.get(SEARCH_VIEW, {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_posts_search_uses_template(self):
+        """Проверяем, что страница поиска использует свой шаблон
+        и без запроса ничего не ищет."""
+        response = self.guest_client.get(SEARCH_VIEW)
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_posts_search_matches_text_group_author_and_comments(self):
+        """Проверяем, что поиск находит сообщение по тексту, названию
+        группы, имени автора и тексту комментария."""
+        Comment.objects.create(
+            post=self.other_post, author=self.user, text='Файлы fsociety'
+        )
+        search_config = {
+            'иллюзия': [self.post],
+            'робот': [self.post],
+            'elliot': [self.post],
+            'fsociety': [self.other_post],
+            'отсутствует': [],
+        }
+        for query, expected in search_config.items():
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), expected)
+
+    def test_posts_search_ranks_text_above_comments(self):
+        """Проверяем, что совпадение в тексте сообщения ранжируется выше
+        совпадения в комментарии."""
+        Comment.objects.create(
+            post=self.other_post, author=self.user, text='Это иллюзия'
+        )
+        self.assertEqual(self.found('иллюзия'), [self.post, self.other_post])
+
+    def test_posts_search_index_follows_changes(self):
+        """Проверяем, что индекс обновляется при правке сообщения,
+        переименовании группы и удалении сообщения."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Сделать мир лучше'
+        post.save()
+        self.assertEqual(self.found('иллюзия'), [])
+        self.assertEqual(self.found('лучше'), [post])
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Общество'
+        group.save()
+        self.assertEqual(self.found('робот'), [])
+        self.assertEqual(self.found('общество'), [post])
+        post.delete()
+        self.assertEqual(self.found('лучше'), [])
+
+    def test_posts_search_pagination_keeps_query(self):
+        """Проверяем, что ссылки пагинатора сохраняют поисковый запрос."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Сигнал {num}')
+            for num in range(OBJECTS_PER_PAGE + 1)
+        )
+        search.get_backend().rebuild()
+        response = self.guest_client.get(SEARCH_VIEW, {'q': 'сигнал'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), OBJECTS_PER_PAGE)
+        self.assertContains(response, 'q=%D1%81%D0%B8%D0%B3%D0%BD%D0%B0%D0%BB')
+        next_page = self.guest_client.get(
+            SEARCH_VIEW, {'q': 'сигнал', 'cursor': page_obj.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(next_page), 1)
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import reverse
+
+from .. import feed_cache
+from ..paginators import CursorPage
+
+INDEX_VIEW = reverse('posts:index')
+WORKERS = 8
+KEY = 'fsociety'
+
+
+class CountingBuild:
+    """Подсчитывает пересборки; задержка имитирует тяжёлый запрос."""
+
+    def __init__(self, value='Привет, друг', delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.value
+
+
+class PostsStampedeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_posts_parallel_misses_build_page_once(self):
+        """Проверяем, что одновременные промахи по одной странице
+        собирают её один раз, а остальные дожидаются результата."""
+        build = CountingBuild(CursorPage(['Привет, друг']), delay=0.3)
+        request = RequestFactory().get(INDEX_VIEW)
+        barrier = threading.Barrier(WORKERS)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(
+                feed_cache.get_page(
+                    request, 'index', [feed_cache.INDEX], build
+                )
+            )
+
+        threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(build.calls, 1)
+        self.assertEqual(
+            [list(page_obj) for page_obj in results],
+            [['Привет, друг']] * WORKERS,
+        )
+
+    def test_posts_expired_entry_is_served_while_refreshing(self):
+        """Проверяем, что пока запись обновляет другой воркер,
+        отдаётся устаревшее значение."""
+        cache.set(KEY, ('Контроль — это иллюзия', time.time() - 1, 0.0))
+        cache.add(f'lock:{KEY}', 1)
+        build = CountingBuild()
+        self.assertEqual(
+            feed_cache.fetch(KEY, build), ('Контроль — это иллюзия', True)
+        )
+        self.assertEqual(build.calls, 0)
+
+    def test_posts_expired_entry_is_refreshed_by_one_worker(self):
+        """Проверяем, что устаревшую запись пересобирает взявший
+        блокировку воркер."""
+        cache.set(KEY, ('Контроль — это иллюзия', time.time() - 1, 0.0))
+        build = CountingBuild()
+        self.assertEqual(feed_cache.fetch(KEY, build), ('Привет, друг', False))
+        self.assertEqual(feed_cache.fetch(KEY, build), ('Привет, друг', True))
+        self.assertEqual(build.calls, 1)
+
+    def test_posts_slow_entry_is_refreshed_early(self):
+        """Проверяем, что запись с долгой сборкой обновляется заранее,
+        а с быстрой — нет."""
+        build = CountingBuild()
+        cache.set(KEY, ('Контроль — это иллюзия', time.time() + 10, 0.0))
+        feed_cache.fetch(KEY, build)
+        self.assertEqual(build.calls, 0)
+        cache.set(KEY, ('Контроль — это иллюзия', time.time() + 10, 1e6))
+        self.assertEqual(feed_cache.fetch(KEY, build), ('Привет, друг', False))
+        self.assertEqual(build.calls, 1)
@@ -0,0 +1,249 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from .. import thumbnails
+from ..forms import PostForm
+from ..models import Post, User
+from ..templatetags.post_cards import card_key
+from ..templatetags.post_images import post_pictures
+
+INDEX_VIEW = reverse('posts:index')
+POST_CREATE_VIEW = reverse('posts:post_create')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PIXEL = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def pixel(name='pixel.gif'):
+    return SimpleUploadedFile(
+        name=name, content=PIXEL, content_type='image/gif'
+    )
+
+
+def picture(name, color):
+    """Отдельное изображение на каждый цвет: одинаковые файлы
+    хранилище бы склеило."""
+    content = BytesIO()
+    Image.new('RGB', (4, 2), color).save(content, 'PNG')
+    return SimpleUploadedFile(
+        name=name, content=content.getvalue(), content_type='image/png'
+    )
+
+
+def thumbnail_files():
+    found = []
+    for root, _, files in os.walk(os.path.join(TEMP_MEDIA_ROOT, 'cache')):
+        found.extend(os.path.join(root, name) for name in files)
+    return found
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class PostsThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # kvstore sorl живёт в кеше, а файлы удаляются между тестами.
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_posts_generate_thumbnails_command(self):
+        """Проверяем, что команда создаёт миниатюры для уже
+        сохранённых сообщений."""
+        for num in range(2):
+            Post.objects.create(
+                author=self.user,
+                text='Привет',
+                image=picture(f'{num}.png', (num, 0, 0)),
+            )
+        out = StringIO()
+        call_command('generate_thumbnails', workers=0, stdout=out)
+        self.assertIn('для 2 изображений', out.getvalue())
+        self.assertEqual(
+            len(thumbnail_files()), 2 * len(thumbnails.geometries())
+        )
+
+    def test_posts_feed_renders_responsive_picture(self):
+        """Проверяем, что лента отдаёт <picture> с вариантами WebP
+        в srcset, размерами и ленивой загрузкой, а страница сообщения —
+        без ленивой загрузки."""
+        post = Post.objects.create(
+            author=self.user, text='Привет', image=pixel()
+        )
+        feed = self.authorized_client.get(INDEX_VIEW).content.decode()
+        self.assertIn('<source type="image/webp"', feed)
+        for width in thumbnails.WIDTHS:
+            self.assertRegex(feed, rf'\.webp {width}w')
+        self.assertIn('width="960" height="339" loading="lazy"', feed)
+        detail = self.authorized_client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        ).content.decode()
+        self.assertIn('<picture>', detail)
+        self.assertNotIn('loading="lazy"', detail)
+
+    def test_posts_pictures_resolved_with_one_lookup(self):
+        """Проверяем, что метаданные миниатюр всей страницы читаются
+        из kvstore одним запросом и совпадают с get_thumbnail."""
+        posts = [
+            Post.objects.create(
+                author=self.user,
+                text='Привет',
+                image=picture(f'{num}.png', (num, 0, 0)),
+            )
+            for num in range(3)
+        ]
+        for post in posts:
+            thumbnails.generate(post.image.name)
+        # В кеше kvstore пусто, метаданные остались только в БД.
+        cache.clear()
+        with self.assertNumQueries(1):
+            pictures = post_pictures(posts)
+        with self.assertNumQueries(0):
+            post_pictures(posts)
+        geometry, options = thumbnails.FALLBACK
+        for post in posts:
+            with self.subTest(image=post.image.name):
+                self.assertEqual(
+                    pictures[post.image.name]['image'].url,
+                    get_thumbnail(post.image, geometry, **options).url,
+                )
+
+    def test_posts_card_without_pictures_is_not_cached(self):
+        """Проверяем, что карточка, миниатюры которой не удалось
+        подготовить, не попадает в кеш и после восстановления файла
+        отрисовывается уже с изображением."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Привет, друг',
+            image=picture('a.png', 'red'),
+        )
+        path = post.image.path
+        os.rename(path, f'{path}.bak')
+        with self.assertLogs('sorl.thumbnail', 'ERROR'):
+            response = self.authorized_client.get(INDEX_VIEW)
+        self.assertNotContains(response, '<picture')
+        self.assertIsNone(cache.get(card_key(post, 'feed')))
+        os.rename(f'{path}.bak', path)
+        self.authorized_client.get(INDEX_VIEW)
+        self.assertIn('<picture', cache.get(card_key(post, 'feed')))
+
+
+class Rollback(Exception):
+    pass
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_WORKERS=0)
+class PostsThumbnailCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(username='elliot')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_posts_form_generates_thumbnails_on_upload(self):
+        """Проверяем, что миниатюры создаются при сохранении формы
+        с изображением, а не при первом показе сообщения."""
+        self.authorized_client.post(
+            POST_CREATE_VIEW,
+            data={'text': 'Привет, друг', 'image': pixel()},
+        )
+        post = Post.objects.get(author=self.user)
+        self.assertTrue(post.image.name.endswith(f'{post.image_hash}.gif'))
+        self.assertEqual(len(thumbnail_files()), len(thumbnails.geometries()))
+
+    def test_posts_form_does_not_generate_thumbnails_on_rollback(self):
+        """Проверяем, что миниатюры создаются только после фиксации
+        транзакции и не создаются при её откате."""
+        form = PostForm(
+            data={'text': 'Привет, друг'}, files={'image': pixel()}
+        )
+        form.instance.author = self.user
+        self.assertTrue(form.is_valid())
+        with self.assertRaises(Rollback):
+            with transaction.atomic():
+                form.save()
+                self.assertEqual(thumbnail_files(), [])
+                raise Rollback
+        self.assertEqual(thumbnail_files(), [])
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POSTS_THUMBNAIL_WORKERS=1,
+    # Воркеры spawn подключились бы к боевой БД, а не к тестовой.
+    POSTS_THUMBNAIL_START_METHOD='fork',
+)
+class PostsThumbnailPoolTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(username='elliot')
+
+    def tearDown(self):
+        thumbnails.reset_executor()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_posts_generate_many_in_pool(self):
+        """Проверяем, что пул создаёт миниатюры для всех изображений,
+        даже когда их больше, чем помещается в очередь."""
+        count = 2 * thumbnails.QUEUE_PER_WORKER + 1
+        names = [
+            Post.objects.create(
+                author=self.user,
+                text='Привет',
+                image=picture(f'{num}.png', (num, 0, 0)),
+            ).image.name
+            for num in range(count)
+        ]
+        done, failed = thumbnails.generate_many(iter(names), 1)
+        self.assertEqual((done, failed), (count, []))
+        self.assertEqual(
+            len(thumbnail_files()), count * len(thumbnails.geometries())
+        )
+
+    def test_posts_schedule_submits_to_shared_pool(self):
+        """Проверяем, что schedule отдаёт генерацию общему пулу
+        процессов."""
+        post = Post.objects.create(
+            author=self.user, text='Привет', image=pixel()
+        )
+        thumbnails.schedule(post.image.name)
+        executor = thumbnails.get_executor()
+        executor.shutdown(wait=True)
+        self.assertEqual(len(thumbnail_files()), len(thumbnails.geometries()))
@@ -0,0 +1,233 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import counters, timeline
+from ..models import Follow, Post, TimelineEntry, User, UserStats
+
+FOLLOW_INDEX_VIEW = reverse('posts:follow_index')
+OBJECTS_PER_PAGE = settings.PAGINATOR_SLICING_CONFIG
+POST_CREATE_VIEW = reverse('posts:post_create')
+
+
+class PostsTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='elliot')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Привет, подписчик',
+        )
+        cls.PROFILE_FOLLOW_VIEW = reverse(
+            'posts:profile_follow', kwargs={'username': cls.author.username}
+        )
+        cls.PROFILE_UNFOLLOW_VIEW = reverse(
+            'posts:profile_unfollow', kwargs={'username': cls.author.username}
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_posts_timeline_backfill_and_trim_on_subscription(self):
+        """Подписка добавляет в ленту прошлые сообщения автора,
+        отписка их убирает."""
+        self.follower_client.get(self.PROFILE_FOLLOW_VIEW)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.follower, post=self.post
+            ).exists()
+        )
+        self.follower_client.get(self.PROFILE_UNFOLLOW_VIEW)
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.follower).exists()
+        )
+
+    def test_posts_timeline_fan_out_on_post_create(self):
+        """Новое сообщение раскладывается по лентам подписчиков
+        и первым появляется в избранной ленте."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.author_client.post(POST_CREATE_VIEW, data={'text': 'Новость'})
+        new_post = Post.objects.get(text='Новость')
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.follower, post=new_post, pub_date=new_post.pub_date
+            ).exists()
+        )
+        response = self.follower_client.get(FOLLOW_INDEX_VIEW)
+        self.assertEqual(response.context['page_obj'][0], new_post)
+
+    def test_posts_timeline_rebuild_command(self):
+        """Команда rebuild_timelines восстанавливает ленты из подписок."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.create(
+            user=self.author,
+            author=self.follower,
+            post=self.post,
+            pub_date=self.post.pub_date,
+        )
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(self.follower.pk, self.post.pk)],
+        )
+
+
+@override_settings(TIMELINE_CELEBRITY_THRESHOLD=2)
+class PostsHybridTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.celebrity = User.objects.create_user(username='whiterose')
+        cls.author = User.objects.create_user(username='elliot')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=cls.follower, author=cls.celebrity)
+        Follow.objects.create(user=cls.fan, author=cls.celebrity)
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        counters.reconcile()
+        timeline.rebuild()
+
+    def setUp(self):
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_posts_celebrity_post_is_not_fanned_out(self):
+        """Сообщение популярного автора не копируется в ленты,
+        но появляется в ленте подписчика при чтении."""
+        celebrity_client = Client()
+        celebrity_client.force_login(self.celebrity)
+        celebrity_client.post(POST_CREATE_VIEW, data={'text': 'Для всех'})
+        post = Post.objects.get(text='Для всех')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.follower_client.get(FOLLOW_INDEX_VIEW)
+        self.assertEqual(response.context['page_obj'][0], post)
+
+    def test_posts_merged_feed_walks_without_gaps(self):
+        """Слитая лента листается курсором без пропусков и повторов."""
+        author_client = Client()
+        author_client.force_login(self.author)
+        for num in range(OBJECTS_PER_PAGE + 2):
+            Post.objects.create(author=self.celebrity, text=f'Звезда {num}')
+            author_client.post(POST_CREATE_VIEW, data={'text': f'Автор {num}'})
+        expected = list(
+            Post.objects.filter(
+                author__in=(self.celebrity, self.author)
+            ).order_by('-pub_date', '-id')
+        )
+        walked = []
+        cursor = None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            page_obj = self.follower_client.get(
+                FOLLOW_INDEX_VIEW, params
+            ).context['page_obj']
+            walked.extend(page_obj)
+            if not page_obj.has_next():
+                break
+            cursor = page_obj.next_cursor
+        self.assertEqual(walked, expected)
+
+
+@override_settings(
+    TIMELINE_CELEBRITY_THRESHOLD=3, TIMELINE_CELEBRITY_RELEASE_THRESHOLD=2
+)
+class PostsCelebrityModeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='whiterose')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{num}')
+            for num in range(3)
+        ]
+        cls.PROFILE_FOLLOW_VIEW = reverse(
+            'posts:profile_follow', kwargs={'username': cls.author.username}
+        )
+        cls.PROFILE_UNFOLLOW_VIEW = reverse(
+            'posts:profile_unfollow', kwargs={'username': cls.author.username}
+        )
+
+    def setUp(self):
+        self.clients = []
+        for reader in self.readers:
+            client = Client()
+            client.force_login(reader)
+            self.clients.append(client)
+
+    def mode(self):
+        stats = UserStats.objects.get(user=self.author)
+        return stats.is_celebrity, stats.mode_pending
+
+    def switch(self):
+        call_command('switch_timeline_modes', stdout=StringIO())
+
+    def feed(self, client):
+        return list(client.get(FOLLOW_INDEX_VIEW).context['page_obj'])
+
+    def test_posts_celebrity_mode_survives_threshold_crossings(self):
+        """Подписка и отписка только отмечают, что режим автора пора
+        сменить; команда меняет его, и сообщение популярного автора
+        остаётся в ленте подписчика на каждом шаге."""
+        for client in self.clients:
+            client.get(self.PROFILE_FOLLOW_VIEW)
+        self.assertEqual(self.mode(), (False, True))
+        self.switch()
+        self.assertEqual(self.mode(), (True, False))
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(POST_CREATE_VIEW, data={'text': 'Для всех'})
+        post = Post.objects.get(text='Для всех')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed(self.clients[0]), [post])
+
+        self.clients[2].get(self.PROFILE_UNFOLLOW_VIEW)
+        self.assertEqual(self.mode(), (True, False))
+        self.clients[1].get(self.PROFILE_UNFOLLOW_VIEW)
+        self.assertEqual(self.mode(), (True, True))
+        self.assertEqual(self.feed(self.clients[0]), [post])
+        self.switch()
+        self.assertEqual(self.mode(), (False, False))
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(self.readers[0].pk, post.pk)],
+        )
+        self.assertEqual(self.feed(self.clients[0]), [post])
+
+        self.clients[1].get(self.PROFILE_FOLLOW_VIEW)
+        self.clients[2].get(self.PROFILE_FOLLOW_VIEW)
+        self.assertEqual(TimelineEntry.objects.filter(post=post).count(), 3)
+        self.switch()
+        self.assertEqual(self.mode(), (True, False))
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        for client in self.clients:
+            self.assertEqual(self.feed(client), [post])
+
+    def test_posts_reconcile_counters_switches_mode(self):
+        """Сверка счётчиков переключает режим автора, если исправленное
+        число подписчиков пересекло порог."""
+        for reader in self.readers:
+            Follow.objects.create(user=reader, author=self.author)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(self.mode(), (True, False))
+
+    @override_settings(TIMELINE_BACKFILL_LIMIT=2)
+    def test_posts_backfill_copies_only_recent_posts(self):
+        """При подписке в ленту копируются только последние
+        TIMELINE_BACKFILL_LIMIT сообщений автора."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Сообщение {num}')
+            for num in range(3)
+        ]
+        self.clients[0].get(self.PROFILE_FOLLOW_VIEW)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('post', flat=True)),
+            {posts[1].pk, posts[2].pk},
+        )
@@ -28,6 +28,7 @@ class PostsURLTests(TestCase):
         cls.POST_DETAIL_PATH = f'/posts/{cls.post.pk}/'
         cls.POST_EDIT_PATH = f'/posts/{cls.post.pk}/edit/'
         cls.POST_COMMENT_PATH = f'/posts/{cls.post.pk}/comment/'
+        cls.POST_COMMENTS_PATH = f'/posts/{cls.post.pk}/comments/'
 
     def setUp(self):
         self.guest_client = Client()
@@ -56,6 +57,7 @@ class PostsURLTests(TestCase):
             self.GROUP_PATH,
             self.PROFILE_PATH,
             self.POST_DETAIL_PATH,
+            self.POST_COMMENTS_PATH,
         )
         for url in url_names:
             with self.subTest():
@@ -8,11 +8,13 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Follow, Group, Post, User
+from .. import feed_cache
+from ..models import Comment, Follow, Group, Post, User
 
 INDEX_VIEW = reverse('posts:index')
 POST_CREATE_VIEW = reverse('posts:post_create')
 OBJECTS_PER_PAGE = settings.PAGINATOR_SLICING_CONFIG
+COMMENTS_PER_PAGE = settings.COMMENTS_SLICING_CONFIG
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 PIXEL = (
     b'\x47\x49\x46\x38\x39\x61\x02\x00'
@@ -22,7 +24,6 @@ PIXEL = (
     b'\x02\x00\x01\x00\x00\x02\x02\x0C'
     b'\x0A\x00\x3B'
 )
-CACHE_KEY = settings.POSTS_INDEX_CACHE_KEY
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -94,7 +95,7 @@ class PostsViewTests(TestCase):
     def test_posts_index_page_valid_context(self):
         """Проверяем, что во view элемента главной страницы отрисован
         правильный context."""
-        cache.delete(CACHE_KEY)
+        cache.clear()
         response = self.guest_client.get(INDEX_VIEW)
         self.context_validation_config(response.context['page_obj'][0])
         self.assertEqual(
@@ -102,9 +103,19 @@ class PostsViewTests(TestCase):
         )
 
     def test_posts_index_page_caches_context(self):
-        """Проверяем, что view главной страницы кеширует context."""
+        """Проверяем, что view главной страницы кеширует вычисленную
+        страницу и сбрасывает кеш при появлении нового сообщения."""
+        cache.clear()
         initial_response = self.guest_client.get(INDEX_VIEW)
         initial_posts_count = len(initial_response.context['page_obj'])
+        with self.assertNumQueries(0):
+            cached_response = self.guest_client.get(INDEX_VIEW)
+        self.assertEqual(
+            list(cached_response.context['page_obj']),
+            list(initial_response.context['page_obj']),
+        )
+        self.assertEqual(feed_cache.stats('index')['hits'], 1)
+        self.assertEqual(feed_cache.stats('index')['misses'], 1)
 
         self.new_post = Post.objects.create(
             text='Привет, некешируемый друг', author=self.user
@@ -112,15 +123,9 @@ class PostsViewTests(TestCase):
 
         refresh_response = self.guest_client.get(INDEX_VIEW)
         refresh_posts_count = len(refresh_response.context['page_obj'])
-        self.assertEqual(initial_posts_count, refresh_posts_count)
-
-        cache.delete(CACHE_KEY)
-
-        reset_cache_response = self.guest_client.get(INDEX_VIEW)
-        reset_cache_posts_count = len(reset_cache_response.context['page_obj'])
-        self.assertNotEqual(initial_posts_count, reset_cache_posts_count)
+        self.assertNotEqual(initial_posts_count, refresh_posts_count)
         self.assertEqual(
-            reset_cache_response.context['page_obj'][0].text,
+            refresh_response.context['page_obj'][0].text,
             self.new_post.text,
         )
 
@@ -264,7 +269,7 @@ class PostsPaginatorViewTests(TestCase):
     def test_posts_views_paginator_10_posts_per_page(self):
         """Проверяем, что для всех релевантных views пагинатор слайсит
         по 10 постов на страницу."""
-        cache.delete(CACHE_KEY)
+        cache.clear()
         paginator_views_config = (
             INDEX_VIEW,
             self.PAGINATOR_GROUP_VIEW,
@@ -280,7 +285,97 @@ class PostsPaginatorViewTests(TestCase):
                 self.assertEqual(
                     len(response.context.get('page_obj')), OBJECTS_PER_PAGE
                 )
-        cache.delete(CACHE_KEY)
+        cache.clear()
+
+    def test_posts_views_cursor_paginator_walks_feed(self):
+        """Проверяем, что курсорный пагинатор листает ленту вперёд и назад
+        без пропусков и повторов."""
+        cache.clear()
+        paginator_views_config = (
+            INDEX_VIEW,
+            self.PAGINATOR_GROUP_VIEW,
+            self.PAGINATOR_PROFILE_VIEW,
+        )
+        for view in paginator_views_config:
+            with self.subTest(view=view):
+                first_page = self.guest_client.get(view).context['page_obj']
+                self.assertFalse(first_page.has_previous())
+                self.assertTrue(first_page.has_next())
+                second_page = self.guest_client.get(
+                    view, {'cursor': first_page.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(second_page), OBJECTS_PER_PAGE)
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    {post.pk for post in first_page}
+                    | {post.pk for post in second_page},
+                    {post.pk for post in Post.objects.all()},
+                )
+                previous_page = self.guest_client.get(
+                    view, {'cursor': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(previous_page), list(first_page))
+                self.assertFalse(previous_page.has_previous())
+        cache.clear()
+
+    def test_posts_views_invalid_cursor_falls_back_to_first_page(self):
+        """Проверяем, что битый курсор возвращает первую страницу."""
+        response = self.guest_client.get(
+            self.PAGINATOR_GROUP_VIEW, {'cursor': 'fsociety'}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            list(Post.objects.order_by('-pub_date', '-id')[:OBJECTS_PER_PAGE]),
+        )
+
+
+class PostsCommentsViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+        cls.post = Post.objects.create(author=cls.user, text='Привет, друг')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {num}')
+            for num in range(COMMENTS_PER_PAGE + 5)
+        )
+        cls.POST_DETAIL_VIEW = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        cls.POST_COMMENTS_VIEW = reverse(
+            'posts:post_comments', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_posts_post_detail_renders_first_comments_page(self):
+        """Проверяем, что страница сообщения отрисовывает только первую
+        страницу комментариев со ссылкой на продолжение."""
+        response = self.guest_client.get(self.POST_DETAIL_VIEW)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, self.POST_COMMENTS_VIEW)
+
+    def test_posts_comments_fragment_continues_thread(self):
+        """Проверяем, что фрагмент «загрузить ещё» отдаёт оставшиеся
+        комментарии без повторов."""
+        first_page = self.guest_client.get(self.POST_DETAIL_VIEW).context[
+            'comments'
+        ]
+        response = self.guest_client.get(
+            self.POST_COMMENTS_VIEW, {'cursor': first_page.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments_list.html')
+        next_page = response.context['comments']
+        self.assertEqual(len(next_page), 5)
+        self.assertFalse(next_page.has_next())
+        self.assertEqual(
+            {comment.pk for comment in first_page}
+            | {comment.pk for comment in next_page},
+            set(Comment.objects.values_list('pk', flat=True)),
+        )
 
 
 class PostsFollowViewTests(TestCase):
@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверки числа SQL-запросов, которые делает view, для TestCase."""
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(context.captured_queries)
+
+    def assertQueryBudget(self, client, url, budget):
+        """view укладывается в заданное число запросов."""
+        queries = self.count_queries(client, url)
+        self.assertLessEqual(
+            queries,
+            budget,
+            f'{url}: {queries} SQL-запросов при бюджете {budget}',
+        )
+
+    def assertQueriesDoNotGrow(self, client, url, add_rows):
+        """Число запросов view не зависит от числа строк на странице:
+        add_rows добавляет строки между двумя замерами."""
+        before = self.count_queries(client, url)
+        add_rows()
+        after = self.count_queries(client, url)
+        self.assertEqual(
+            before,
+            after,
+            f'{url}: число SQL-запросов выросло с {before} до {after} '
+            'вместе с размером страницы',
+        )
+
+
+class QueryPlanMixin:
+    """Проверки планов запросов, которые делает view, для TestCase."""
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # На маленьких тестовых таблицах планировщику дешевле
+                # полный просмотр: запрещаем его, чтобы увидеть, есть ли
+                # подходящий индекс.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def is_sorted_scan(self, plan):
+        if connection.vendor == 'postgresql':
+            return 'Seq Scan' in plan and 'Sort' in plan
+        return 'USE TEMP B-TREE FOR ORDER BY' in plan
+
+    def assertIndexedOrdering(self, client, url):
+        """Каждый упорядоченный запрос view читает строки по индексу,
+        а не полным просмотром с последующей сортировкой."""
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        ordered = [
+            query['sql']
+            for query in context.captured_queries
+            if 'ORDER BY' in query['sql']
+        ]
+        self.assertTrue(ordered, f'{url}: нет упорядоченных запросов')
+        for sql in ordered:
+            plan = self.explain(sql)
+            self.assertFalse(
+                self.is_sorted_scan(plan),
+                f'{url}: запрос сортируется без индекса\n{sql}\n{plan}',
+            )
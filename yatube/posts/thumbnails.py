@@ -0,0 +1,234 @@
+import multiprocessing
+import threading
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import EXTENSIONS
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+
+# Миниатюра в JPEG для старых браузеров; её пропорции задают
+# и варианты других форматов.
+FALLBACK = settings.POSTS_THUMBNAILS[0]
+WIDTH, HEIGHT = map(int, FALLBACK[0].split('x'))
+WIDTHS = settings.POSTS_IMAGE_WIDTHS
+# Сколько задач на процесс пула может ждать в очереди generate_many.
+QUEUE_PER_WORKER = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_name(source, geometry, options):
+    """Имя файла миниатюры, как его вычисляет
+    ThumbnailBackend.get_thumbnail, но без обращения к kvstore."""
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def fetch_raw(keys):
+    """Сырые значения kvstore sorl по ключам: для cached_db — один
+    get_many из кеша и один запрос к БД на промахи."""
+    # Модели sorl импортируются здесь: воркеры пула загружают этот
+    # модуль до django.setup().
+    from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+    from sorl.thumbnail.models import KVStore
+
+    kvstore = default.kvstore
+    if not hasattr(kvstore, 'cache'):
+        values = {key: kvstore._get_raw(key) for key in keys}
+        return {key: value for key, value in values.items() if value}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(
+            KVStore.objects.filter(key__in=missing).values_list('key', 'value')
+        )
+        kvstore.cache.set_many(
+            {key: stored.get(key, EMPTY_VALUE) for key in missing},
+            sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+        values.update(stored)
+    return {
+        key: value for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+def resolve(images, items=None):
+    """Миниатюры items (по умолчанию geometries()) для всех images
+    за один запрос к kvstore: {имя изображения: {(геометрия, формат):
+    ImageFile}}. Недостающие миниатюры создаются через get_thumbnail;
+    изображения, для которых это не удалось, в ответ не попадают.
+    """
+    items = geometries() if items is None else items
+    wanted = {}
+    for image in images:
+        source = ImageFile(image)
+        for geometry, options in items:
+            thumbnail = ImageFile(
+                thumbnail_name(source, geometry, options), default.storage
+            )
+            wanted[add_prefix(thumbnail.key)] = (
+                image.name,
+                geometry,
+                options,
+            )
+    found = fetch_raw(list(wanted))
+    resolved = {}
+    failed = set()
+    for key, (name, geometry, options) in wanted.items():
+        if key in found:
+            thumbnail = deserialize_image_file(found[key])
+        else:
+            thumbnail = get_thumbnail(name, geometry, **options)
+        if thumbnail.size is None:
+            # При ошибке get_thumbnail не бросает исключение, а пишет
+            # его в лог и возвращает миниатюру без размеров.
+            failed.add(name)
+        resolved.setdefault(name, {})[
+            geometry, options.get('format')
+        ] = thumbnail
+    return {
+        name: items for name, items in resolved.items() if name not in failed
+    }
+
+
+def supported_formats():
+    """Форматы POSTS_IMAGE_FORMATS, которые умеют сохранять и Pillow,
+    и sorl (AVIF появляется только в свежих версиях обоих)."""
+    Image.init()
+    return tuple(
+        fmt
+        for fmt in settings.POSTS_IMAGE_FORMATS
+        if fmt in Image.SAVE and fmt in EXTENSIONS
+    )
+
+
+def variant(width, fmt):
+    """Геометрия и опции миниатюры шириной width в формате fmt."""
+    geometry = f'{width}x{round(width * HEIGHT / WIDTH)}'
+    return geometry, {**FALLBACK[1], 'format': fmt}
+
+
+def geometries():
+    """Все миниатюры, которые нужны шаблонам для одного изображения."""
+    return [
+        *settings.POSTS_THUMBNAILS,
+        *(
+            variant(width, fmt)
+            for fmt in supported_formats()
+            for width in WIDTHS
+        ),
+    ]
+
+
+def generate(name):
+    """Создаёт все миниатюры geometries() для изображения name и
+    возвращает их число. Готовые миниатюры sorl берёт из kvstore."""
+    items = geometries()
+    for geometry, options in items:
+        get_thumbnail(name, geometry, **options)
+    return len(items)
+
+
+def setup_worker():
+    django.setup()
+
+
+def make_executor(workers):
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(
+            settings.POSTS_THUMBNAIL_START_METHOD
+        ),
+        initializer=setup_worker,
+    )
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = make_executor(settings.POSTS_THUMBNAIL_WORKERS)
+        return _executor
+
+
+def reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _collect(pending, return_when, failed):
+    """Дожидается задач пула, убирает завершённые из pending, дописывает
+    имена неудачных в failed и возвращает число успешных."""
+    finished, _ = wait(pending, return_when=return_when)
+    done = 0
+    for future in finished:
+        name = pending.pop(future)
+        if future.exception() is None:
+            done += 1
+        else:
+            failed.append(name)
+    return done
+
+
+def generate_many(names, workers):
+    """Создаёт миниатюры для names в пуле из workers процессов (0 — в
+    текущем процессе) и возвращает число готовых и список неудачных.
+
+    names может быть ленивым итератором: в очереди пула одновременно
+    не больше workers * QUEUE_PER_WORKER задач."""
+    done, failed = 0, []
+    if not workers:
+        for name in names:
+            try:
+                generate(name)
+            except Exception:
+                failed.append(name)
+            else:
+                done += 1
+        return done, failed
+    pending = {}
+    with make_executor(workers) as executor:
+        for name in names:
+            if len(pending) >= workers * QUEUE_PER_WORKER:
+                done += _collect(pending, FIRST_COMPLETED, failed)
+            pending[executor.submit(generate, name)] = name
+        done += _collect(pending, ALL_COMPLETED, failed)
+    return done, failed
+
+
+def schedule(name):
+    """Отправляет генерацию миниатюр в пул процессов; при
+    POSTS_THUMBNAIL_WORKERS = 0 создаёт их сразу в текущем процессе.
+    Если пул недоступен, миниатюры создаст шаблон при первом показе."""
+    if not settings.POSTS_THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    try:
+        get_executor().submit(generate, name)
+    except BrokenProcessPool:
+        reset_executor()
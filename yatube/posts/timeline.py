@@ -0,0 +1,241 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import feed_cache
+from .models import Follow, Post, TimelineEntry, UserStats
+from .paginators import POST_ORDERING, MergedCursorPaginator, paginate
+
+BATCH_SIZE = settings.TIMELINE_FANOUT_BATCH_SIZE
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+
+
+def is_celebrity(author_id):
+    """Сообщения популярных авторов не раскладываются по лентам,
+    а подмешиваются при чтении. Режим хранится у автора и меняет его
+    только switch_mode."""
+    return UserStats.objects.filter(
+        user_id=author_id, is_celebrity=True
+    ).exists()
+
+
+def followed_celebrities(user):
+    return list(
+        Follow.objects.filter(
+            user=user, author__stats__is_celebrity=True
+        ).values_list('author', flat=True)
+    )
+
+
+def _bulk_insert(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _follower_ids(author_id):
+    return (
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+        .iterator()
+    )
+
+
+def fan_out(post):
+    """Раскладывает новое сообщение по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            author_id=post.author_id,
+            post_id=post.pk,
+            pub_date=post.pub_date,
+        )
+        for user_id in _follower_ids(post.author_id)
+    )
+
+
+def _recent_posts(author_id, after=0):
+    """Последние TIMELINE_BACKFILL_LIMIT сообщений автора с id больше
+    after: более старые в ленты подписок не копируются."""
+    return list(
+        Post.objects.filter(author_id=author_id, pk__gt=after)
+        .order_by(*POST_ORDERING)
+        .values_list('pk', 'pub_date')[: settings.TIMELINE_BACKFILL_LIMIT]
+    )
+
+
+def _copy_posts(user_ids, author_id, posts):
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            author_id=author_id,
+            post_id=post_id,
+            pub_date=pub_date,
+        )
+        for user_id in user_ids
+        for post_id, pub_date in posts
+    )
+
+
+def _follower_batches(author_id):
+    """id подписчиков автора порциями по BATCH_SIZE в порядке
+    подписки: подписки, появившиеся во время обхода, тоже попадут
+    в последнюю порцию."""
+    last_pk = 0
+    while True:
+        batch = list(
+            Follow.objects.filter(author_id=author_id, pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'user_id')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        last_pk = batch[-1][0]
+        yield [user_id for _, user_id in batch]
+
+
+def backfill(user, author):
+    """Добавляет в ленту подписчика последние сообщения нового
+    автора."""
+    if not is_celebrity(author.pk):
+        _copy_posts([user.pk], author.pk, _recent_posts(author.pk))
+
+
+def _mode_mismatch():
+    """Авторы, чей режим разошёлся с числом подписчиков: популярным
+    автор становится при TIMELINE_CELEBRITY_THRESHOLD подписчиков,
+    а перестаёт им быть ниже TIMELINE_CELEBRITY_RELEASE_THRESHOLD,
+    чтобы режим не менялся на каждой подписке у самой границы."""
+    return Q(
+        is_celebrity=False,
+        followers_count__gte=settings.TIMELINE_CELEBRITY_THRESHOLD,
+    ) | Q(
+        is_celebrity=True,
+        followers_count__lt=settings.TIMELINE_CELEBRITY_RELEASE_THRESHOLD,
+    )
+
+
+def mark_mode_switch(author_id=None):
+    """Отмечает, что режим автора (по умолчанию — всех авторов) пора
+    переключить. Само переключение переписывает ленты всех
+    подписчиков, поэтому его делает switch_modes вне запроса."""
+    stats = UserStats.objects.filter(_mode_mismatch())
+    if author_id is not None:
+        stats = stats.filter(user_id=author_id)
+    return stats.update(mode_pending=True)
+
+
+def switch_mode(author_id):
+    """Переключает режим автора порциями по BATCH_SIZE, не оставляя
+    подписчиков без его сообщений ни на одном шаге. Возвращает True,
+    если режим изменился."""
+    stats = UserStats.objects.filter(user_id=author_id)
+    if stats.filter(
+        _mode_mismatch(), is_celebrity=False, mode_pending=True
+    ).update(is_celebrity=True, mode_pending=False):
+        # Сообщения уже подмешиваются при чтении, копии в лентах
+        # отбрасываются слиянием как повторы и удаляются порциями.
+        entries = TimelineEntry.objects.filter(author_id=author_id)
+        while True:
+            batch = list(entries.values_list('pk', flat=True)[:BATCH_SIZE])
+            if not batch:
+                break
+            TimelineEntry.objects.filter(pk__in=batch).delete()
+        _invalidate_followers(author_id)
+        return True
+    if not stats.filter(
+        _mode_mismatch(), is_celebrity=True, mode_pending=True
+    ).exists():
+        stats.update(mode_pending=False)
+        return False
+    # Пока ленты заполняются, сообщения ещё подмешиваются при чтении;
+    # режим меняется только потом, а сообщения, вышедшие за время
+    # копирования и не разложенные по лентам, докладываются следом.
+    posts = _recent_posts(author_id)
+    for user_ids in _follower_batches(author_id):
+        _copy_posts(user_ids, author_id, posts)
+    stats.update(is_celebrity=False, mode_pending=False)
+    newer = _recent_posts(
+        author_id, after=max((post_id for post_id, _ in posts), default=0)
+    )
+    if newer:
+        for user_ids in _follower_batches(author_id):
+            _copy_posts(user_ids, author_id, newer)
+    _invalidate_followers(author_id)
+    return True
+
+
+def _invalidate_followers(author_id):
+    # Набор областей, от которых зависит лента подписчика, изменился:
+    # страницы, собранные в прежнем режиме, больше не годятся.
+    feed_cache.invalidate(feed_cache.author_scope(author_id))
+    for user_ids in _follower_batches(author_id):
+        feed_cache.invalidate(*map(feed_cache.follower_scope, user_ids))
+
+
+def switch_modes():
+    """switch_mode для всех авторов, отмеченных mark_mode_switch;
+    возвращает число авторов, чей режим изменился."""
+    authors = UserStats.objects.filter(mode_pending=True).values_list(
+        'user_id', flat=True
+    )
+    return sum(switch_mode(author_id) for author_id in list(authors))
+
+
+def trim(user, author):
+    """Убирает из ленты подписчика сообщения автора после отписки."""
+    TimelineEntry.objects.filter(user=user, author=author).delete()
+
+
+@transaction.atomic
+def rebuild():
+    """Заново определяет режим всех авторов по текущему порогу
+    и собирает ленты подписок с нуля."""
+    UserStats.objects.update(is_celebrity=False, mode_pending=False)
+    UserStats.objects.filter(
+        followers_count__gte=settings.TIMELINE_CELEBRITY_THRESHOLD
+    ).update(is_celebrity=True)
+    TimelineEntry.objects.all().delete()
+    authors = (
+        Follow.objects.exclude(author__stats__is_celebrity=True)
+        .order_by()
+        .values_list('author_id', flat=True)
+        .distinct()
+    )
+    for author_id in list(authors):
+        posts = _recent_posts(author_id)
+        for user_ids in _follower_batches(author_id):
+            _copy_posts(user_ids, author_id, posts)
+
+
+def resolve_posts(keys):
+    post_ids = [post_id for _, post_id in keys]
+    posts = Post.objects.select_related('author', 'group').in_bulk(post_ids)
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+def paginate_feed(request, user, per_page, celebrities=None):
+    """Лента подписок: записи материализованной ленты, слитые
+    с сообщениями популярных авторов, прочитанными напрямую;
+    celebrities — уже известный список таких авторов."""
+    if request.GET.get('page') and not request.GET.get('cursor'):
+        posts_list = Post.objects.select_related('author', 'group').filter(
+            author__following__user=user
+        )
+        return paginate(request, posts_list, per_page)
+    sources = [(TimelineEntry.objects.filter(user=user), TIMELINE_ORDERING)]
+    sources.extend(
+        (Post.objects.filter(author_id=author_id), POST_ORDERING)
+        for author_id in (
+            followed_celebrities(user) if celebrities is None else celebrities
+        )
+    )
+    paginator = MergedCursorPaginator(sources, per_page, resolve_posts)
+    return paginator.get_page(request.GET.get('cursor'))
@@ -1,59 +1,87 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_GET
 
+from . import counters, feed_cache, resolvers, search, timeline
+from .conditional import ConditionalPage
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Follow, Post, UserStats
+from .paginators import CursorPage, CursorPaginator, paginate
 
 OBJECTS_PER_PAGE = settings.PAGINATOR_SLICING_CONFIG
-CACHE_KEY = settings.POSTS_INDEX_CACHE_KEY
+COMMENTS_PER_PAGE = settings.COMMENTS_SLICING_CONFIG
+COMMENTS_ORDERING = ('-created', '-id')
 
 
 @require_GET
 def index(request):
     template = 'posts/index.html'
     text = 'Новостная лента проекта Yatube'
-    posts_list = cache.get(CACHE_KEY)
-    if posts_list is None:
-        posts_list = Post.objects.all()
-        cache.set(CACHE_KEY, posts_list, timeout=20)
-    paginator = Paginator(posts_list, OBJECTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    scopes = [feed_cache.INDEX]
+    conditional = ConditionalPage(request, 'index', scopes)
+    if conditional.not_modified is not None:
+        return conditional.not_modified
+    posts_list = Post.objects.select_related('author', 'group')
+    page_obj = feed_cache.get_page(
+        request,
+        'index',
+        scopes,
+        lambda: paginate(request, posts_list, OBJECTS_PER_PAGE),
+    )
     context = {
         'text': text,
         'page_obj': page_obj,
     }
-    return render(request, template, context)
+    return conditional.finish(render(request, template, context))
 
 
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     text = f'Новости группы {slug} на Yatube'
-    group = get_object_or_404(Group, slug=slug)
-    posts_list = group.group_post.all()
-    paginator = Paginator(posts_list, OBJECTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = resolvers.get_group_or_404(slug)
+    scopes = [feed_cache.group_scope(group.pk)]
+    conditional = ConditionalPage(request, 'group', scopes)
+    if conditional.not_modified is not None:
+        return conditional.not_modified
+    posts_list = group.group_post.select_related('author', 'group')
+    page_obj = feed_cache.get_page(
+        request,
+        'group',
+        scopes,
+        lambda: paginate(request, posts_list, OBJECTS_PER_PAGE),
+    )
     context = {
         'text': text,
         'group': group,
         'page_obj': page_obj,
     }
-    return render(request, template, context)
+    return conditional.finish(render(request, template, context))
 
 
 def profile(request, username):
     template = 'posts/profile.html'
     text = 'Профайл пользователя'
-    profile = get_object_or_404(User, username=username)
-    posts_list = profile.posts.all()
-    paginator = Paginator(posts_list, OBJECTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    profile = resolvers.get_user_or_404(username)
+    conditional = ConditionalPage(
+        request,
+        'profile',
+        [
+            feed_cache.author_scope(profile.pk),
+            feed_cache.profile_scope(profile.pk),
+        ],
+    )
+    if conditional.not_modified is not None:
+        return conditional.not_modified
+    profile.stats = UserStats.objects.filter(user=profile).first()
+    posts_list = profile.posts.select_related('author', 'group')
+    page_obj = feed_cache.get_page(
+        request,
+        'profile',
+        [feed_cache.author_scope(profile.pk)],
+        lambda: paginate(request, posts_list, OBJECTS_PER_PAGE),
+    )
     following = request.user.is_authenticated and Follow.objects.filter(
         author=profile,
         user=request.user,
@@ -62,38 +90,87 @@ def profile(request, username):
         'text': text,
         'author': profile,
         'page_obj': page_obj,
-        'paginator': paginator,
         'following': following,
     }
+    return conditional.finish(render(request, template, context))
+
+
+@require_GET
+def post_search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    text = f'Поиск: {query}' if query else 'Поиск по Yatube'
+    page_obj = CursorPage([])
+    if query:
+        page_obj = search.paginate_results(request, query, OBJECTS_PER_PAGE)
+    context = {
+        'text': text,
+        'query': query,
+        'page_obj': page_obj,
+    }
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.select_related('post')
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id
+    )
+    conditional = ConditionalPage(
+        request,
+        'post_detail',
+        [
+            feed_cache.post_scope(post.pk),
+            feed_cache.profile_scope(post.author_id),
+        ],
+    )
+    if conditional.not_modified is not None:
+        return conditional.not_modified
+    comments = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_PER_PAGE,
+        ordering=COMMENTS_ORDERING,
+    ).get_page()
     form = CommentForm()
     context = {
         'post': post,
         'comments': comments,
         'form': form,
     }
+    return conditional.finish(render(request, template, context))
+
+
+@require_GET
+def post_comments(request, post_id):
+    template = 'posts/includes/comments_list.html'
+    post = get_object_or_404(Post.objects.only('pk'), id=post_id)
+    comments = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_PER_PAGE,
+        ordering=COMMENTS_ORDERING,
+    ).get_page(request.GET.get('cursor'))
+    context = {
+        'post': post,
+        'comments': comments,
+    }
     return render(request, template, context)
 
 
 @login_required
 def post_create(request):
     template = 'posts/create_post.html'
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     context = {
         'form': form,
     }
     if not form.is_valid():
         return render(request, template, context)
 
-    post = form.save(commit=False)
-    post.author = request.user
-    post.save()
+    form.instance.author = request.user
+    with transaction.atomic():
+        post = form.save()
+        timeline.fan_out(post)
+        counters.post_created(post)
     return redirect('posts:profile', username=request.user.username)
 
 
@@ -122,7 +199,9 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            counters.comment_added(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -130,31 +209,54 @@ def add_comment(request, post_id):
 def follow_index(request):
     template = 'posts/follow.html'
     text = f'Избранные авторы пользователя {request.user.username}'
-    posts_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts_list, OBJECTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    celebrities = timeline.followed_celebrities(request.user)
+    scopes = [
+        feed_cache.follower_scope(request.user.pk),
+        *map(feed_cache.author_scope, celebrities),
+    ]
+    conditional = ConditionalPage(request, 'follow', scopes)
+    if conditional.not_modified is not None:
+        return conditional.not_modified
+    page_obj = feed_cache.get_page(
+        request,
+        'follow',
+        scopes,
+        lambda: timeline.paginate_feed(
+            request, request.user, OBJECTS_PER_PAGE, celebrities
+        ),
+    )
     context = {
         'text': text,
         'page_obj': page_obj,
-        'paginator': paginator,
     }
-    return render(request, template, context)
+    return conditional.finish(render(request, template, context))
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = resolvers.get_user_or_404(username)
     if request.user != author:
-        Follow.objects.get_or_create(
-            author=author,
-            user=request.user,
-        )
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(
+                author=author,
+                user=request.user,
+            )
+            if created:
+                counters.followed(request.user, author)
+                timeline.mark_mode_switch(author.pk)
+                timeline.backfill(request.user, author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(author=author, user=request.user).delete()
+    author = resolvers.get_user_or_404(username)
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            author=author, user=request.user
+        ).delete()
+        timeline.trim(request.user, author)
+        if deleted:
+            counters.unfollowed(request.user, author)
+            timeline.mark_mode_switch(author.pk)
     return redirect('posts:profile', username=username)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from core.cache import delete_on_commit
+
+CACHE_KEY = settings.USERS_CACHE_KEY
+CACHE_TIMEOUT = settings.USERS_CACHE_TIMEOUT
+
+
+def user_key(user_id):
+    return f'{CACHE_KEY}:{user_id}'
+
+
+def invalidate(user_id):
+    delete_on_commit([user_key(user_id)])
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт request.user из кеша, а не из
+    auth_user. Запись сбрасывается при сохранении и удалении
+    пользователя."""
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
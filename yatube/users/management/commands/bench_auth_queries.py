@@ -0,0 +1,86 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.cache import isolated_caches
+
+User = get_user_model()
+
+SCENARIOS = (
+    (
+        'db + ModelBackend',
+        'django.contrib.sessions.backends.db',
+        'django.contrib.auth.backends.ModelBackend',
+    ),
+    (
+        'cached_db + cached user',
+        'django.contrib.sessions.backends.cached_db',
+        'users.backends.CachedModelBackend',
+    ),
+    (
+        'cache + cached user',
+        'django.contrib.sessions.backends.cache',
+        'users.backends.CachedModelBackend',
+    ),
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число SQL-запросов и задержку авторизованного запроса '
+        'при разных хранилищах сессий и request.user. '
+        'Все тестовые данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        paths = (reverse('about:author'), reverse('posts:index'))
+        self.stdout.write(f'{requests} запросов к каждой странице')
+        for name, engine, backend in SCENARIOS:
+            with override_settings(
+                CACHES=isolated_caches(),
+                SESSION_ENGINE=engine,
+                AUTHENTICATION_BACKENDS=[backend],
+            ):
+                for path in paths:
+                    queries, ms = self.run_scenario(path, requests)
+                    self.stdout.write(
+                        f'{name:>24} | {path:>15} | {queries:5.2f} запросов'
+                        f' | {ms:6.2f} мс/запрос'
+                    )
+
+    def run_scenario(self, path, requests):
+        result = []
+        try:
+            with transaction.atomic():
+                result.extend(self.measure(path, requests))
+                raise Rollback
+        except Rollback:
+            pass
+        return result
+
+    def measure(self, path, requests):
+        cache.clear()
+        user = User.objects.create_user(username='bench_reader')
+        client = Client()
+        client.force_login(user)
+        client.get(path)
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                client.get(path)
+        ms = (time.perf_counter() - started) * 1000 / requests
+        return len(queries) / requests, ms
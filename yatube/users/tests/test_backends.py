@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..backends import CachedModelBackend
+
+User = get_user_model()
+
+ABOUT_AUTHOR_VIEW = reverse('about:author')
+
+
+class UsersCachedBackendTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='elliot')
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+
+    def test_users_backend_caches_user(self):
+        """Проверяем, что повторный поиск пользователя не обращается
+        к БД."""
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_users_backend_cache_invalidated_on_save(self):
+        """Проверяем, что сохранение пользователя сбрасывает кеш."""
+        self.backend.get_user(self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Эллиот'
+        user.save()
+        self.assertEqual(
+            self.backend.get_user(self.user.pk).first_name, 'Эллиот'
+        )
+        user.is_active = False
+        user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    def test_users_authenticated_request_without_queries(self):
+        """Проверяем, что сессия и request.user авторизованного
+        пользователя берутся из кеша."""
+        client = Client()
+        client.force_login(self.user)
+        client.get(ABOUT_AUTHOR_VIEW)
+        with self.assertNumQueries(0):
+            response = client.get(ABOUT_AUTHOR_VIEW)
+        self.assertEqual(response.context['user'], self.user)
@@ -1,7 +1,8 @@
 import os
+
 import sentry_sdk
-from sentry_sdk.integrations.django import DjangoIntegration
 from dotenv import load_dotenv
+from sentry_sdk.integrations.django import DjangoIntegration
 
 load_dotenv()
 sentry_sdk.init(
@@ -19,11 +20,66 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_error'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TwoTierCache',
+        'OPTIONS': {
+            'SHARED_CACHE': 'shared',
+            'MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+            'POLL_INTERVAL': 1,
+            'LOCAL_PREFIXES': (
+                'feed_page:',
+                'post_card:',
+                'auth_user:',
+                'resolve:',
+            ),
+        },
+    },
+    'shared': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', ''),
+    },
 }
 
-POSTS_INDEX_CACHE_KEY = 'index_page'
+POSTS_FEED_CACHE_KEY = 'feed_page'
+
+POSTS_FEED_CACHE_TIMEOUT = 60 * 60
+
+POSTS_FEED_CACHE_LOCK_TIMEOUT = 10
+
+POSTS_FEED_CACHE_STALE_TIMEOUT = 60
+
+POSTS_CARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+POSTS_RESOLVER_CACHE_KEY = 'resolve'
+
+POSTS_RESOLVER_CACHE_TIMEOUT = 60 * 60
+
+POSTS_RESOLVER_MISSING_TIMEOUT = 30
+
+POSTS_THUMBNAILS = (('960x339', {'crop': 'top', 'upscale': True}),)
+
+POSTS_IMAGE_WIDTHS = (320, 640, 960)
+
+POSTS_IMAGE_FORMATS = ('AVIF', 'WEBP')
+
+POSTS_THUMBNAIL_WORKERS = int(os.getenv('POSTS_THUMBNAIL_WORKERS', 2))
+
+# spawn, а не fork: дочерний процесс не должен делить с воркером
+# gunicorn открытые соединения с БД и кешем.
+POSTS_THUMBNAIL_START_METHOD = 'spawn'
+
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+)
+
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
+USERS_CACHE_KEY = 'auth_user'
+
+USERS_CACHE_TIMEOUT = 60 * 60
 
 SECRET_KEY = os.getenv('DJANGO_KEY')
 
@@ -71,7 +127,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPALTES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -80,10 +135,30 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
             ],
+            'loaders': [
+                (
+                    'django.template.loaders.cached.Loader',
+                    [
+                        'django.template.loaders.filesystem.Loader',
+                        'django.template.loaders.app_directories.Loader',
+                    ],
+                ),
+            ],
         },
     },
 ]
 
+TEMPLATE_WARMUP = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'loggers': {
+        'core.warmup': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
@@ -126,6 +201,26 @@ USE_TZ = True
 
 PAGINATOR_SLICING_CONFIG = 10
 
+PAGINATOR_WINDOW_CONFIG = 2
+
+PAGINATOR_COUNT_ESTIMATE_THRESHOLD = 100000
+
+PAGINATOR_COUNT_CACHE_TIMEOUT = 600
+
+COMMENTS_SLICING_CONFIG = 20
+
+POSTS_SEARCH_CONFIG = 'russian'
+
+POSTS_SEARCH_MAX_OFFSET = 1000
+
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+
+TIMELINE_CELEBRITY_THRESHOLD = 10000
+
+TIMELINE_CELEBRITY_RELEASE_THRESHOLD = 9000
+
+TIMELINE_BACKFILL_LIMIT = 1000
+
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]